@@ -1,52 +1,289 @@
+import traceback
+
 import pygame
 
-from utils.localDataManager import getGames
+from emu import Emu
+from utils.localDataManager import getLibrary, loadGame
+from utils.quirks import platformProfiles
 
 class Menu:
+    """
+        Menu is the game library browser: a scrollable list of the games filtered as the user types,
+        with a live preview of the selected game running headless.
+
+        The screen is only redrawn after an input event or a new preview frame, and never more than maxFps times
+        per second. Text is rendered once and reused. While nothing happens the loop sleeps in pygame.event.wait.
+    """
+
     def __init__(self):
         pygame.init()
 
-        self.screen = pygame.display.set_mode((1280, 640))
-        self.font = pygame.font.SysFont("arialblack", 40)
+        self.width = 1280
+        self.height = 640
 
-        self.clearScreen()
+        self.screen = pygame.display.set_mode((self.width, self.height))
+        self.font = pygame.font.SysFont("arialblack", 28)
+        self.smallFont = pygame.font.SysFont("arialblack", 18)
+
+        self.background = (255, 255, 255)
+        self.foreground = (0, 0, 0)
+
+        self.maxFps = 30 # Redraws per second at most, while keys are held or the preview is running
+        self.lineHeight = 40
+        self.listTop = 90
+        self.visibleLines = (self.height - self.listTop) // self.lineHeight
+
+        self.previewScale = 8 # Size of a CHIP-8 pixel in the preview
+        self.previewLength = 180 # Number of frames the preview is animated, then its last frame is kept
+        self.previewPalette = [self.background] * 255 + [self.foreground] # Frame buffer pixels are 0 or 255
+
+        self.library = getLibrary()
+        self.games = self.library.getNames()
+
+        self.search = ""
+        self.matches = list(self.games) # Games whose name contains the search
+        self.selectedGame = 0 # Index in matches
+        self.scroll = 0 # Index in matches of the first visible line
+
+        self.texts = {} # Rendered text surfaces, by (text, font, highlighted)
+        self.previews = {} # Last frame of the finished previews, by game name
 
-        self.games = getGames()
-        self.selectedGame = 0
+        self.preview = None # Emulator of the running preview
+        self.previewFramesLeft = 0
+        self.previewName = None
+        self.previewSurface = None
 
-    def drawText(self, text):
-        renderedText = self.font.render(text, True, (0,0,0))
-        renderedTextRect = renderedText.get_rect(center = (1280 / 2, 640 / 2))
+        self.dirty = True # Set when the screen must be redrawn
 
-        self.screen.blit(renderedText, (renderedTextRect))
+    def getText(self, text, font = None, highlighted = False):
+        """
+            Return the rendered surface of a text, rendered only the first time.
+        """
+
+        font = font or self.font
+        key = (text, font, highlighted)
+
+        surface = self.texts.get(key)
+
+        if surface == None:
+            if highlighted:
+                surface = font.render(text, True, self.background, self.foreground)
+            else:
+                surface = font.render(text, True, self.foreground)
+
+            self.texts[key] = surface
+
+        return surface
 
     def clearScreen(self):
-        self.screen.fill((255, 255, 255))
+        self.screen.fill(self.background)
 
     def openLibrary(self):
         return self.loop()
 
+    def getSelectedGame(self):
+        if not self.matches:
+            return None
+
+        return self.matches[self.selectedGame]
+
+    def select(self, index):
+        """
+            Select a game of the filtered list and scroll so it stays visible.
+        """
+
+        if not self.matches:
+            self.startPreview() # Nothing is selected, stop the preview
+            self.dirty = True
+            return
+
+        self.selectedGame = index % len(self.matches)
+
+        if self.selectedGame < self.scroll:
+            self.scroll = self.selectedGame
+        elif self.selectedGame >= self.scroll + self.visibleLines:
+            self.scroll = self.selectedGame - self.visibleLines + 1
+
+        self.startPreview()
+        self.dirty = True
+
+    def setSearch(self, search):
+        """
+            Filter the list, the selected game is kept when it still matches.
+        """
+
+        selected = self.getSelectedGame()
+
+        self.search = search
+        self.matches = [game for game in self.games if search.lower() in game.lower()]
+
+        self.scroll = 0
+        self.select(self.matches.index(selected) if selected in self.matches else 0)
+        self.dirty = True
+
+    def startPreview(self):
+        """
+            Start running the selected game headless, unless its preview already finished.
+        """
+
+        name = self.getSelectedGame()
+
+        if name == self.previewName:
+            return
+
+        self.previewName = name
+        self.preview = None
+        self.previewSurface = self.previews.get(name)
+
+        if name == None or self.previewSurface != None:
+            return
+
+        self.preview = Emu()
+        self.preview.scheduler.unlimited = True
+        loadGame(self.preview, name)
+        self.preview.play(headless = True, frames = 1)
+        self.previewFramesLeft = self.previewLength
+
+        self.updatePreview()
+
+    def advancePreview(self):
+        """
+            Run the preview for the time of one redraw, then stop it once it reached previewLength frames.
+        """
+
+        preview = self.preview
+        frames = max(1, preview.scheduler.frameRate // self.maxFps)
+
+        try:
+            preview.gameOn = True
+            preview.loop(frames = frames)
+        except Exception:
+            preview.error = traceback.format_exc() # The game crashed, keep its last frame
+
+        self.updatePreview()
+        self.previewFramesLeft -= frames
+
+        if preview.error or self.previewFramesLeft <= 0:
+            self.finishPreview()
+
+    def updatePreview(self):
+        frameBuffer = self.preview.dm.frameBuffer
+
+        surface = pygame.image.frombuffer(frameBuffer.toPixels(), (frameBuffer.width, frameBuffer.height), "P")
+        surface.set_palette(self.previewPalette)
+
+        self.previewSurface = pygame.transform.scale(surface, (64 * self.previewScale, 32 * self.previewScale))
+        self.dirty = True
+
+    def finishPreview(self):
+        self.previews[self.previewName] = self.previewSurface
+        self.preview = None
+
+    def draw(self):
+        self.clearScreen()
+
+        self.screen.blit(self.getText("Search: " + self.search + "_"), (40, 20))
+
+        if not self.matches:
+            self.screen.blit(self.getText("No game found"), (40, self.listTop))
+
+        for line, game in enumerate(self.matches[self.scroll:self.scroll + self.visibleLines]):
+            highlighted = self.scroll + line == self.selectedGame
+            self.screen.blit(self.getText(game, highlighted = highlighted), (40, self.listTop + line * self.lineHeight))
+
+        name = self.getSelectedGame()
+
+        if name != None:
+            entry = self.library.getEntry(name)
+            left = self.width - 64 * self.previewScale - 60
+            top = self.listTop + 30
+
+            if self.previewSurface != None:
+                pygame.draw.rect(self.screen, self.foreground, self.previewSurface.get_rect(topleft = (left, top)).inflate(4, 4), 2)
+                self.screen.blit(self.previewSurface, (left, top))
+
+            details = "%s  %d bytes  %s  %s quirks" % (name, entry["size"], entry["platform"], entry.get("quirks", platformProfiles[entry["platform"]]))
+            self.screen.blit(self.getText(details, self.smallFont), (left, top + 32 * self.previewScale + 16))
+
+        if len(self.matches) > self.visibleLines: # Scroll bar
+            barHeight = self.visibleLines * self.lineHeight
+            thumbHeight = max(20, barHeight * self.visibleLines // len(self.matches))
+            thumbTop = (barHeight - thumbHeight) * self.scroll // (len(self.matches) - self.visibleLines)
+
+            pygame.draw.rect(self.screen, self.foreground, (16, self.listTop + thumbTop, 6, thumbHeight))
+
+        pygame.display.flip()
+        self.dirty = False
+
+    def handleEvent(self, event):
+        """
+            Apply an input event, return the chosen game name, False to quit or None to keep browsing.
+        """
+
+        if event.type == pygame.QUIT:
+            return False
+
+        if event.type == pygame.TEXTINPUT and event.text.strip():
+            self.setSearch(self.search + event.text.strip())
+
+        elif event.type == pygame.MOUSEWHEEL:
+            self.select(min(max(self.selectedGame - event.y, 0), max(len(self.matches) - 1, 0)))
+
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN and self.matches:
+                return self.getSelectedGame()
+
+            elif event.key in (pygame.K_DOWN, pygame.K_SPACE):
+                self.select(self.selectedGame + 1)
+
+            elif event.key == pygame.K_UP:
+                self.select(self.selectedGame - 1)
+
+            elif event.key == pygame.K_PAGEDOWN:
+                self.select(min(self.selectedGame + self.visibleLines, max(len(self.matches) - 1, 0)))
+
+            elif event.key == pygame.K_PAGEUP:
+                self.select(max(self.selectedGame - self.visibleLines, 0))
+
+            elif event.key == pygame.K_HOME:
+                self.select(0)
+
+            elif event.key == pygame.K_END:
+                self.select(-1)
+
+            elif event.key == pygame.K_BACKSPACE:
+                self.setSearch(self.search[:-1])
+
+            elif event.key == pygame.K_ESCAPE:
+                self.setSearch("")
+
+        return None
+
     def loop(self):
+        clock = pygame.time.Clock()
+        pygame.key.set_repeat(300, 40)
+
+        self.select(0)
+
         while True:
-            events = pygame.event.get()
-            keys = pygame.key.get_pressed()
-
-            self.clearScreen()
-            self.drawText(self.games[self.selectedGame])
-
-            for event in events:
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    return False
-
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
-                        if self.selectedGame == len(self.games) - 1:
-                            self.selectedGame = 0
-                        else :
-                            self.selectedGame += 1
-
-                    if event.key == pygame.K_RETURN:
-                        return self.games[self.selectedGame]
-                
-            pygame.display.flip()
\ No newline at end of file
+            if self.preview == None:
+                events = [pygame.event.wait()] # Nothing to animate, sleep until the next event
+            else:
+                events = [pygame.event.wait(1000 // self.maxFps)]
+
+            for event in events + pygame.event.get():
+                result = self.handleEvent(event)
+
+                if result != None:
+                    if result == False:
+                        pygame.quit()
+
+                    return result
+
+            if self.preview != None:
+                self.advancePreview()
+
+            if self.dirty:
+                self.draw()
+
+            clock.tick(self.maxFps)
@@ -0,0 +1,1372 @@
+import random, os, traceback
+from functools import partial
+from typing import Callable
+
+# Disable pygame init print
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame
+
+from utils.displayManager import DisplayManager
+from utils.romLibrary import detectPlatform
+from utils.quirks import getProfile, platformProfiles
+from utils.scheduler import Scheduler
+from utils.translator import Translator
+from utils.saveState import saveState, loadState
+from utils.inputRecorder import InputRecording
+from utils.keypad import Keypad, keypadOrder
+from utils.buzzer import Buzzer
+from utils.rewindBuffer import RewindBuffer
+from utils.profiler import Profiler
+from utils.debugger import Debugger
+from utils.disassembler import disassemble
+from utils.errors import UnsupportedInstructionError
+
+class Mem:
+    """
+        Mem class will hold all the variables and functions related to memory management.
+    """
+
+    def __init__(self):
+        self.reset()
+        self.loadFonts()
+
+    def reset(self) -> None:
+        """
+            Reset all variables to their default state.
+        """
+
+        self.mem = bytearray(4096) # Memory is composed of 4096 8-bit value
+        self.resize(len(self.mem)) # Allocate the caches
+        self.maxBlockSize = 64 # A translated block never cover more than this number of bytes
+        self.dataOffset = 0x200 # A small part at the beginnig of the memory is reserved for fonts. Actual memory start at 0x200
+
+        self.pc = self.dataOffset # Programm counter
+        self.incrementPC = True # Define whether or not the pc should be incremented
+
+        self.fonts = [
+            0xF0, 0x90, 0x90, 0x90, 0xF0, # 0
+            0x20, 0x60, 0x20, 0x20, 0x70, # 1
+            0xF0, 0x10, 0xF0, 0x80, 0xF0, # 2
+            0xF0, 0x10, 0xF0, 0x10, 0xF0, # 3
+            0x90, 0x90, 0xF0, 0x10, 0x10, # 4
+            0xF0, 0x80, 0xF0, 0x10, 0xF0, # 5
+            0xF0, 0x80, 0xF0, 0x90, 0xF0, # 6
+            0xF0, 0x10, 0x20, 0x40, 0x40, # 7
+            0xF0, 0x90, 0xF0, 0x90, 0xF0, # 8
+            0xF0, 0x90, 0xF0, 0x10, 0xF0, # 9
+            0xF0, 0x90, 0xF0, 0x90, 0x90, # A
+            0xE0, 0x90, 0xE0, 0x90, 0xE0, # B
+            0xF0, 0x80, 0x80, 0x80, 0xF0, # C
+            0xE0, 0x90, 0x90, 0x90, 0xE0, # D
+            0xF0, 0x80, 0xF0, 0x80, 0xF0, # E
+            0xF0, 0x80, 0xF0, 0x80, 0x80  # F
+        ]
+
+        self.bigFontOffset = len(self.fonts) # High resolution fonts are loaded right after the fonts
+        self.bigFonts = [
+            0xFF, 0xFF, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, # 0
+            0x18, 0x78, 0x78, 0x18, 0x18, 0x18, 0x18, 0x18, 0xFF, 0xFF, # 1
+            0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, # 2
+            0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, # 3
+            0xC3, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, 0x03, 0x03, 0x03, 0x03, # 4
+            0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, # 5
+            0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, # 6
+            0xFF, 0xFF, 0x03, 0x03, 0x06, 0x0C, 0x18, 0x18, 0x18, 0x18, # 7
+            0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, # 8
+            0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, # 9
+            0x7E, 0xFF, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, 0xC3, 0xC3, 0xC3, # A
+            0xFC, 0xFC, 0xC3, 0xC3, 0xFC, 0xFC, 0xC3, 0xC3, 0xFC, 0xFC, # B
+            0x3C, 0xFF, 0xC3, 0xC0, 0xC0, 0xC0, 0xC0, 0xC3, 0xFF, 0x3C, # C
+            0xFC, 0xFE, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xFE, 0xFC, # D
+            0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, # E
+            0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC0, 0xC0, 0xC0, 0xC0  # F
+        ]
+
+        self.registers = [0] * 16 # General purpose registers
+
+        self.sp = 0 # Stack pointer
+        self.stack = [0] * 16 # List of 16 8-bit adress
+
+        self.i = 0 # General index register
+
+        self.st = 0 # Sound timer register
+        self.dt = 0 # Delay timer register
+
+        self.rplFlags = [0] * 16 # SUPER-CHIP persistent flags, saved and loaded with FX75 and FX85
+        self.audioPattern = bytearray(16) # XO-CHIP 128 samples of 1 bit played by the buzzer
+        self.pitch = 64 # XO-CHIP playback rate of the audio pattern, 4000 * 2 ** ((pitch - 64) / 48) samples per second
+
+    def resize(self, size):
+        """
+            Change the memory size, 4 KB for CHIP-8 and SUPER-CHIP, 64 KB for XO-CHIP. The content is kept.
+        """
+
+        self.mem = self.mem[:size].ljust(size, b"\0")
+        self.codeCache = [None] * size # Decoded instruction handlers, indexed by address
+        self.blockCache = [None] * size # Translated basic blocks, indexed by start address
+        self.blockHits = [0] * size # Number of times each address was reached before its block was translated
+        self.addressMask = size - 1 # The index register wrap around the memory
+
+    def loadFonts(self):
+        """
+            Load fonts into memory starting at 0x0
+        """
+
+        fonts = self.fonts + self.bigFonts
+        self.mem[:len(fonts)] = bytes(fonts)
+
+        self.invalidateCode(0, len(fonts))
+
+    def fillMemory(self, gameData: bytes) -> bool:
+        """
+            Fill the game memory with gameData content.
+            Return False if the game does not fit in memory.
+
+            gameData: bytes of the game file
+        """
+
+        try:
+            for index, value in enumerate(gameData):
+                self.mem[index + self.dataOffset] = value
+        except Exception as e:
+            return False
+        finally:
+            self.invalidateCode(self.dataOffset, len(gameData))
+
+        return True
+
+    def invalidateCode(self, address, length):
+        """
+            Forget the decoded instructions and translated blocks overlapping the memory range,
+            must be called after any write into memory.
+        """
+
+        start = max(address - 1, 0) # The instruction starting one byte before also read the first byte
+        end = min(address + length, len(self.mem))
+
+        if start < end:
+            self.codeCache[start:end] = [None] * (end - start)
+
+        # Blocks starting before the range can still cover it, the ones ending before it are kept
+        blockCache = self.blockCache
+        for blockStart in range(max(address - self.maxBlockSize + 1, 0), end):
+            block = blockCache[blockStart]
+            if block != None and blockStart + max(block[1], 1) * 2 > address:
+                blockCache[blockStart] = None
+
+    def freezePC(self):
+        self.incrementPC = False
+
+    def updatePC(self):
+        if self.incrementPC:
+            self.pc += 2
+
+        self.incrementPC = True
+
+    def decrementTimers(self):
+        if self.st > 0:
+            self.st -= 1
+
+        if self.dt > 0:
+            self.dt -= 1
+
+    def getpointedMemory(self, offset = 0):
+        return self.mem[self.pc + offset]
+
+    def getValuesAt(self, address):
+        return self.mem[address]
+
+    def readWord(self, address):
+        """
+            Return the 16 bits word at address, 0 past the end of the memory.
+        """
+
+        if address < 0 or address + 1 >= len(self.mem):
+            return 0
+
+        return (self.mem[address] << 8) + self.mem[address + 1]
+
+    def getCurrentInstruction(self):
+        return (self.getpointedMemory() << 8) + self.getpointedMemory(1)
+
+    def __str__(self):
+        allVarsFormated: str = "Mem class instance:\n"
+
+        for var in vars(self):
+            if var == "mem" or var == "fonts" or var == "bigFonts" or var == "dataOffset" or var.endswith("Cache"): continue
+            allVarsFormated += "  -" + var + ": " + str(self.__dict__[var]) + "\n"
+
+        return allVarsFormated
+
+class CPU:
+    def __init__(self, mem: Mem, dm: DisplayManager) -> None:
+        self.mem = mem # Memory the CPU works on
+        self.dm = dm # Display the CPU draws on
+        self.platform = "chip8" # Instruction set: "chip8", "schip" (SUPER-CHIP) or "xochip" (XO-CHIP)
+        self.quirks = getProfile("modern") # Behaviour of the ambiguous instructions, see utils/quirks.py
+
+        self.reset()
+
+    def reset(self) -> None:
+        """
+            Reset all variables to their default state.
+            Must be called after Mem.reset to follow the new registers.
+        """
+
+        self.registers = self.mem.registers # Direct reference to the registers, avoid a lookup in every opcode
+        self.random = random.Random() # Random generator of this machine, its state is part of save states
+
+        self.buildTables()
+
+        self.keys = 0 # Keypad state of the current frame, bit n is set when key n is pressed
+        self.waitingKey = False # Set while FX0A waits for a key, execution is suspended until one is pressed
+
+    def setPlatform(self, platform):
+        """
+            Switch the instruction set, the decoded instructions are forgotten.
+        """
+
+        self.platform = platform
+        self.buildTables()
+
+        self.mem.invalidateCode(0, len(self.mem.mem))
+
+    def setQuirks(self, profile):
+        """
+            Switch the quirk profile, by name, the decoded instructions are forgotten.
+        """
+
+        self.quirks = getProfile(profile)
+        self.buildTables()
+
+        self.mem.invalidateCode(0, len(self.mem.mem))
+
+    def buildTables(self):
+        """
+            Build the handler tables of the instruction set of the platform.
+            The quirks are resolved here by choosing the handler variants, the handlers never test them.
+        """
+
+        # Instruction families, 0x0, 0x5, 0x8, 0xE and 0xF are dispatched through their own table
+        self.lookupTable: dict[int, Callable[..., None]] = {
+            0x1: self._1NNN,
+            0x2: self._2NNN,
+            0x3: self._3XNN,
+            0x4: self._4XNN,
+            0x5: self._5XY0,
+            0x6: self._6XNN,
+            0x7: self._7XNN,
+            0x9: self._9XY0,
+            0xA: self._ANNN,
+            0xB: self._BNNN,
+            0xC: self._CXNN,
+            0xD: self._DXYN,
+        }
+
+        self.hTable: dict[int, Callable[..., None]] = {
+            0x0: self._8XY0,
+            0x1: self._8XY1,
+            0x2: self._8XY2,
+            0x3: self._8XY3,
+            0x4: self._8XY4,
+            0x5: self._8XY5,
+            0x6: self._8XY6,
+            0x7: self._8XY7,
+            0xE: self._8XYE,
+        }
+
+        self.zeroTable: dict[int, Callable[..., None]] = {
+            0x0E0: self._00E0,
+            0x0EE: self._00EE,
+        }
+
+        self.fiveTable: dict[int, Callable[..., None]] = {} # 5XYN variants other than 5XY0
+
+        self.eTable: dict[int, Callable[..., None]] = {
+            0x9: self._EX9E,
+            0xA: self._EXA1,
+        }
+
+        self.fTable: dict[int, Callable[..., None]] = {
+            0x07: self._FX07,
+            0x0A: self._FX0A,
+            0x15: self._FX15,
+            0x18: self._FX18,
+            0x29: self._FX29,
+            0x33: self._FX33,
+            0x55: self._FX55,
+            0x65: self._FX65,
+            0x1E: self._FX1E,
+        }
+
+        if self.platform == "schip" or self.platform == "xochip":
+            self.zeroTable.update({0x0C0 | n: partial(self._00CN, n) for n in range(16)})
+            self.zeroTable.update({0x0FB: self._00FB, 0x0FC: self._00FC, 0x0FD: self._00FD, 0x0FE: self._00FE, 0x0FF: self._00FF})
+
+            self.fTable.update({0x30: self._FX30, 0x75: self._FX75, 0x85: self._FX85})
+
+        if self.platform == "xochip":
+            self.zeroTable.update({0x0D0 | n: partial(self._00DN, n) for n in range(16)})
+            self.fiveTable.update({0x2: self._5XY2, 0x3: self._5XY3})
+            self.fTable.update({0x00: self._F000, 0x01: self._FX01, 0x02: self._FX02, 0x3A: self._FX3A})
+
+            # A skipped F000 NNNN instruction is 4 bytes long
+            for code in (0x3, 0x4, 0x5, 0x9):
+                self.lookupTable[code] = self.longSkip(self.lookupTable[code])
+
+            for key in self.eTable:
+                self.eTable[key] = self.longSkip(self.eTable[key])
+
+        quirks = self.quirks
+
+        if quirks["shiftVy"]:
+            self.hTable.update({0x6: self._8XY6FromY, 0xE: self._8XYEFromY})
+
+        if quirks["vfReset"]:
+            for key in (0x1, 0x2, 0x3):
+                self.hTable[key] = self.resetFlag(self.hTable[key])
+
+        if quirks["jumpVx"]:
+            self.lookupTable[0xB] = self._BXNN
+
+        if not quirks["indexOverflow"]:
+            self.fTable[0x1E] = self._FX1ENoFlag
+
+        if quirks["indexIncrement"] != None:
+            for key in (0x55, 0x65):
+                self.fTable[key] = self.incrementIndex(self.fTable[key], quirks["indexIncrement"])
+
+        self.dm.setSpriteMode(quirks["sprites"])
+
+    def longSkip(self, handler):
+        """
+            Wrap a skip handler so it skip the whole F000 NNNN instruction, XO-CHIP only.
+        """
+
+        mem = self.mem
+
+        def skip(*operands):
+            pc = mem.pc
+            handler(*operands)
+
+            if mem.pc != pc and mem.readWord(pc + 2) == 0xF000:
+                mem.pc += 2
+
+        return skip
+
+    def resetFlag(self, handler):
+        """
+            Wrap a logic handler so it reset vf, COSMAC VIP quirk.
+        """
+
+        registers = self.registers
+
+        def logic(x, y):
+            handler(x, y)
+            registers[15] = 0
+
+        return logic
+
+    def incrementIndex(self, handler, increment):
+        """
+            Wrap a load or store handler so it leave i past the registers, at i + x + increment.
+        """
+
+        mem = self.mem
+
+        def load(x):
+            handler(x)
+            mem.i = (mem.i + x + increment) & mem.addressMask
+
+        return load
+
+    def decode(self, instruction : int):
+        """
+            Break down the instruction and return its handler with the operands already bound,
+            the result is meant to be cached and called each time the instruction is executed.
+        """
+
+        code = (instruction & 0xf000) >> 12
+        x = (instruction & 0x0f00) >> 8
+        y = (instruction & 0x00f0) >> 4
+        n = instruction & 0x000f
+        nn = instruction & 0x00ff
+        nnn = instruction & 0x0fff
+
+        if code == 0x0:
+            handler = self.zeroTable.get(nnn)
+            return handler if handler != None else partial(self._0NNN, nnn)
+
+        if code == 0x8: return partial(self.hTable[n], x, y)
+        if code == 0xE: return partial(self.eTable.get(y, self._EXNN), x)
+        if code == 0xF: return partial(self.fTable[nn], x)
+
+        handler = self.lookupTable[code]
+
+        if code == 0x1 or code == 0x2 or code == 0xA or code == 0xB: return partial(handler, nnn)
+        if code == 0x5: return partial(self.fiveTable.get(n, handler), x, y)
+        if code == 0x9: return partial(handler, x, y)
+        if code == 0xD: return partial(self._DXY0, x, y) if n == 0 and self.platform != "chip8" else partial(handler, x, y, n)
+
+        return partial(handler, x, nn)
+
+    def _00E0(self):
+        """
+            Clear the display
+        """
+
+        self.dm.clear()
+
+    def _00EE(self):
+        """
+            Exit subroutine
+        """
+
+        mem = self.mem
+        mem.sp -= 1
+        mem.pc = mem.stack[mem.sp]
+
+    def _0NNN(self, nnn):
+        """
+            Machine code routine, not supported
+        """
+
+        raise UnsupportedInstructionError("Machine code routine at 0x%03X (0NNN) is not supported" % nnn)
+
+    def _00CN(self, n):
+        """
+            Scroll down N rows (SUPER-CHIP)
+        """
+
+        self.dm.scrollDown(n)
+
+    def _00DN(self, n):
+        """
+            Scroll up N rows (XO-CHIP)
+        """
+
+        self.dm.scrollUp(n)
+
+    def _00FB(self):
+        """
+            Scroll right 4 pixels (SUPER-CHIP)
+        """
+
+        self.dm.scrollRight(4)
+
+    def _00FC(self):
+        """
+            Scroll left 4 pixels (SUPER-CHIP)
+        """
+
+        self.dm.scrollLeft(4)
+
+    def _00FD(self):
+        """
+            Exit the interpreter, the program stop on this instruction (SUPER-CHIP)
+        """
+
+        self.mem.incrementPC = False
+
+    def _00FE(self):
+        """
+            Low resolution, 64x32 (SUPER-CHIP)
+        """
+
+        self.dm.setResolution(64, 32)
+
+    def _00FF(self):
+        """
+            High resolution, 128x64 (SUPER-CHIP)
+        """
+
+        self.dm.setResolution(128, 64)
+
+    def _1NNN(self, nnn):
+        """
+            Jump to NNN
+        """
+
+        self.mem.pc = nnn
+        self.mem.incrementPC = False
+
+    def _2NNN(self, nnn):
+        """
+            Call subroutine
+        """
+
+        mem = self.mem
+        mem.stack[mem.sp] = mem.pc
+        mem.sp += 1
+        mem.pc = nnn
+        mem.incrementPC = False
+    
+    def _3XNN(self, x, nn):
+        """
+            if vx != NN then
+        """
+
+        if self.registers[x] == nn:
+            self.mem.pc += 2
+    
+    def _4XNN(self, x, nn):
+        """
+            if vx == NN then
+        """
+
+        if self.registers[x] != nn:
+            self.mem.pc += 2
+
+    def _5XY0(self, x, y):
+        """
+            if vx != vy then
+        """
+
+        registers = self.registers
+        if registers[x] == registers[y]:
+            self.mem.pc += 2
+
+    def _5XY2(self, x, y):
+        """
+            Save vx-vy to i through (i+|y-x|), i is not modified (XO-CHIP). Addresses wrap around the memory.
+        """
+
+        mem = self.mem
+        registers = self.registers
+        step = 1 if x <= y else -1
+        count = abs(y - x) + 1
+
+        for offset, register in enumerate(range(x, y + step, step)):
+            mem.mem[(mem.i + offset) & mem.addressMask] = registers[register]
+
+        mem.invalidateCode(mem.i, count)
+        if mem.i + count > len(mem.mem): # The end wrapped around to the start of the memory
+            mem.invalidateCode(0, (mem.i + count) & mem.addressMask)
+
+    def _5XY3(self, x, y):
+        """
+            Load vx-vy from i through (i+|y-x|), i is not modified (XO-CHIP). Addresses wrap around the memory.
+        """
+
+        mem = self.mem
+        registers = self.registers
+        step = 1 if x <= y else -1
+
+        for offset, register in enumerate(range(x, y + step, step)):
+            registers[register] = mem.mem[(mem.i + offset) & mem.addressMask]
+
+    def _6XNN(self, x, nn):
+        """
+            vx := NN
+        """
+
+        self.registers[x] = nn
+
+    def _7XNN(self, x, nn):
+        """
+            vx += NN
+        """
+
+        registers = self.registers
+        registers[x] = (registers[x] + nn) & 0xff
+
+    def _8XY0(self, x, y):
+        """
+            vx := vy
+        """
+
+        registers = self.registers
+        registers[x] = registers[y] & 0xff
+
+    def _8XY1(self, x, y):
+        """
+            vx |= vy
+        """
+
+        registers = self.registers
+        registers[x] = (registers[x] | registers[y]) & 0xff
+
+    def _8XY2(self, x, y):
+        """
+            vx &= vy
+        """
+
+        registers = self.registers
+        registers[x] = (registers[x] & registers[y]) & 0xff
+
+    def _8XY3(self, x, y):
+        """
+            vx ^= vy
+        """
+
+        registers = self.registers
+        registers[x] = (registers[x] ^ registers[y]) & 0xff
+
+    def _8XY4(self, x, y):
+        """
+            vx += vy and vf = 1 on carry
+        """
+
+        registers = self.registers
+        result = registers[x] + registers[y]
+
+        registers[15] = 1 if result > 0xFF else 0
+        registers[x] = result & 0xff
+
+    def _8XY5(self, x, y):
+        """
+            vx -= vy and vf = 0 on borrow
+        """
+
+        registers = self.registers
+        vx = registers[x]
+        vy = registers[y]
+
+        registers[15] = 0 if vy > vx else 1
+        registers[x] = (vx - vy) & 0xff
+
+    def _8XY6(self, x, y):
+        """
+            vx >> 1, vf = old least significant bit
+        """
+
+        registers = self.registers
+        vx = registers[x]
+
+        registers[15] = vx & 0x01
+        registers[x] = vx >> 1
+
+    def _8XY6FromY(self, x, y):
+        """
+            vx := vy >> 1, vf = old least significant bit of vy
+        """
+
+        registers = self.registers
+        vy = registers[y]
+
+        registers[15] = vy & 0x01
+        registers[x] = vy >> 1
+
+    def _8XY7(self, x, y):
+        """
+            vx = vy - vx, vf = 0 on borrow
+        """
+
+        registers = self.registers
+        vx = registers[x]
+        vy = registers[y]
+
+        registers[15] = 0 if vx > vy else 1
+        registers[x] = (vy - vx) & 0xff
+
+    def _8XYE(self, x, y):
+        """
+            vx << 1, vf = old most significant bit
+        """
+
+        registers = self.registers
+        vx = registers[x]
+
+        registers[15] = vx >> 7
+        registers[x] = (vx << 1) & 0xFF
+
+    def _8XYEFromY(self, x, y):
+        """
+            vx := vy << 1, vf = old most significant bit of vy
+        """
+
+        registers = self.registers
+        vy = registers[y]
+
+        registers[15] = vy >> 7
+        registers[x] = (vy << 1) & 0xFF
+
+    def _9XY0(self, x, y):
+        """
+            If vx == vy then
+        """
+
+        registers = self.registers
+        if registers[x] != registers[y]:
+            self.mem.pc += 2
+
+    def _ANNN(self, nnn):
+        """
+            i := NNN
+        """
+
+        self.mem.i = nnn
+
+    def _BNNN(self, nnn):
+        """
+            jump0 NNN, Jump to address NNN + v0
+        """
+
+        self.mem.pc = nnn + self.registers[0]
+        self.mem.incrementPC = False
+
+    def _BXNN(self, nnn):
+        """
+            jump XNN + vx, CHIP-48 and SUPER-CHIP quirk
+        """
+
+        self.mem.pc = nnn + self.registers[nnn >> 8]
+        self.mem.incrementPC = False
+
+    def _CXNN(self, x, nn):
+        """
+            Random number between 0 and 255 then XORed with NN then loaded into vx
+        """
+
+        rint = self.random.randint(0, 255)
+        self.registers[x] = rint & nn
+
+    def _DXYN(self, x, y, n):
+        """
+            Draw function
+        """
+
+        mem = self.mem
+        dm = self.dm
+
+        xOffset = mem.registers[x]
+        yOffset = mem.registers[y]
+
+        mem.registers[15] = dm.drawSprite(xOffset, yOffset, mem.mem[mem.i:mem.i + n * dm.planeCount])
+
+    def _DXY0(self, x, y):
+        """
+            Draw a 16x16 sprite (SUPER-CHIP)
+        """
+
+        mem = self.mem
+        dm = self.dm
+
+        mem.registers[15] = dm.drawSprite(mem.registers[x], mem.registers[y], mem.mem[mem.i:mem.i + 32 * dm.planeCount], 16)
+
+    def _EX9E(self, x):
+        """
+            if key not pressed then
+        """
+
+        if (self.keys >> self.registers[x]) & 1:
+            self.mem.pc += 2
+
+    def _EXA1(self, x):
+        """
+            if key is pressed then
+        """
+
+        if not (self.keys >> self.registers[x]) & 1:
+            self.mem.pc += 2
+
+    def _EXNN(self, x):
+        """
+            Unknown key instruction, ignored
+        """
+
+    def _FX07(self, x):
+        """
+            vx := delay
+        """
+
+        self.registers[x] = self.mem.dt
+
+    def _FX0A(self, x):
+        """
+            Wait for a keypress 
+        """
+
+        keyPressed = False
+
+        for key in keypadOrder:
+            if (self.keys >> key) & 1:
+                self.registers[x] = key
+                keyPressed = True
+
+        if keyPressed == False:
+            self.mem.incrementPC = False
+
+        self.waitingKey = not keyPressed
+
+    def _FX15(self, x):
+        """
+            delay := vx
+        """
+
+        self.mem.dt = self.registers[x]
+
+    def _FX18(self, x):
+        """
+            Buzzer
+        """
+
+        self.mem.st = self.registers[x]
+
+    def _FX29(self, x):
+        """
+            Set i to the start location of the fonts for vx
+        """
+
+        self.mem.i = self.registers[x] * 5
+
+    def _FX30(self, x):
+        """
+            Set i to the start location of the high resolution fonts for vx (SUPER-CHIP)
+        """
+
+        self.mem.i = self.mem.bigFontOffset + (self.registers[x] & 0xf) * 10
+
+    def _FX75(self, x):
+        """
+            Save v0-vx to the persistent flags (SUPER-CHIP)
+        """
+
+        self.mem.rplFlags[:x + 1] = self.registers[:x + 1]
+
+    def _FX85(self, x):
+        """
+            Load v0-vx from the persistent flags (SUPER-CHIP)
+        """
+
+        self.registers[:x + 1] = self.mem.rplFlags[:x + 1]
+
+    def _F000(self, x):
+        """
+            i := NNNN, the 16 bits address in the next word (XO-CHIP)
+        """
+
+        mem = self.mem
+        mem.i = mem.readWord(mem.pc + 2)
+        mem.pc += 2
+
+    def _FX01(self, x):
+        """
+            Select the bitplanes X to draw on (XO-CHIP)
+        """
+
+        self.dm.setPlanes(x & 3)
+
+    def _FX02(self, x):
+        """
+            Load the 16 bytes audio pattern from i (XO-CHIP). Addresses wrap around the memory.
+        """
+
+        mem = self.mem
+        mem.audioPattern[:] = bytes(mem.mem[(mem.i + offset) & mem.addressMask] for offset in range(16))
+
+    def _FX3A(self, x):
+        """
+            pitch := vx (XO-CHIP)
+        """
+
+        self.mem.pitch = self.registers[x]
+
+    def _FX33(self, x):
+        """
+            Decode vx into binary-coded decimal
+        """
+
+        mem = self.mem
+        vx = self.registers[x]
+
+        mem.mem[mem.i] = vx // 100
+        mem.mem[mem.i +1] = (vx % 100) // 10
+        mem.mem[mem.i +2] = vx % 10
+
+        mem.invalidateCode(mem.i, 3)
+
+    def _FX55(self, x):
+        """
+            Save v0-vx to i through (i+x)
+        """
+
+        memory = self.mem.mem
+        registers = self.registers
+        i = self.mem.i
+
+        for j in range(0, x + 1):
+            memory[i + j] = registers[j]
+
+        self.mem.invalidateCode(i, x + 1)
+
+    def _FX65(self, x):
+        """
+            Load v0-vx from i through (i+x)
+        """
+
+        memory = self.mem.mem
+        registers = self.registers
+        i = self.mem.i
+
+        for j in range(0, x + 1):
+            registers[j] = memory[i + j]
+
+    def _FX1E(self, x):
+        """
+            i += vx
+        """
+
+        mem = self.mem
+        mem.i += self.registers[x]
+
+        if mem.i > mem.addressMask:
+            self.registers[15] = 1
+            mem.i &= mem.addressMask
+        else:
+            self.registers[15] = 0
+
+    def _FX1ENoFlag(self, x):
+        """
+            i += vx, vf is left unchanged
+        """
+
+        mem = self.mem
+        mem.i = (mem.i + self.registers[x]) & mem.addressMask
+
+    def __str__(self) -> str:
+        allVarsFormated: str = "CPU class instance:\n"
+
+        for var in vars(self):
+            if var.endswith("Table") or var == "mem" or var == "dm" or var == "registers" or var == "random": continue
+            allVarsFormated += "  -" + var + ": " + str(self.__dict__[var]) + "\n"
+
+        return allVarsFormated
+
+class Emu:
+    """
+        Emu wire together the memory, the CPU and the display of one emulated machine.
+        Several Emu instances can run side by side in the same process.
+    """
+
+    def __init__(self):
+        self.reset()
+
+        self.mem = Mem() # Init Mem class
+        self.dm = DisplayManager() # Init the display class
+        self.cpu = CPU(self.mem, self.dm) # Init CPU class
+        self.keypad = Keypad() # Keypad state, updated from the keyboard events
+        self.translator = Translator(self.mem, self.cpu) # Init the basic block translator
+
+    def log(self, log) -> None:
+        """
+            Wrapper around the print function to control console logging.
+        """
+
+        if self.logging == True:
+            print(log)
+
+    def reset(self):
+        self.logging = False # Set to True to enable logging message into console
+        self.gameData = False
+        self.gameOn = False
+        self.error = None # Traceback of the error that stopped the last game, if any
+        self.quickSave: bytes | None = None # State saved with F5, restored with F9
+
+        self.recording: InputRecording | None = None # Keypad state of each frame is appended to it while recording
+        self.replaying: InputRecording | None = None # Keypad state of each frame is read from it while replaying
+
+        self.rewindBuffer: RewindBuffer | None = None # Recent states, filled every frame when rewind is enabled
+        self.rewinding = False # Set while the rewind key is held
+
+        self.profiler: Profiler | None = None # Set to collect per opcode statistics, slows down the emulation
+        self.debugger: Debugger | None = None # Set to stop on breakpoints and watchpoints, free while none is set
+
+        self.scheduler = Scheduler() # Set scheduler.unlimited to True to run as fast as possible
+        self.buzzer = Buzzer(headless = True) # Sound output of the sound timer, replaced when playing in a window
+        self.translate = False # Set to True to run translated basic blocks instead of interpreting each instruction
+
+    def setRom(self, rom, platform = None, quirks = None):
+        """
+            Load a game, and switch to its platform: "chip8", "schip" or "xochip", detected from the ROM when None,
+            and to its quirk profile, the default one of the platform when None.
+        """
+
+        platform = platform or detectPlatform(rom)
+
+        self.gameData = rom
+        self.setPlatform(platform)
+        self.setQuirks(quirks or platformProfiles[platform])
+
+    def setPlatform(self, platform):
+        """
+            Emulate a platform: "chip8", "schip" for SUPER-CHIP (128x64 high resolution, scrolling, 16x16 sprites)
+            or "xochip" for XO-CHIP (SUPER-CHIP with 64 KB of memory and two bitplanes).
+        """
+
+        self.mem.resize(65536 if platform == "xochip" else 4096)
+        self.cpu.setPlatform(platform)
+
+    def setQuirks(self, profile):
+        """
+            Use a quirk profile: "vip", "chip48", "schip", "modern" or "xochip", see utils/quirks.py.
+        """
+
+        self.cpu.setQuirks(profile)
+
+    def setSeed(self, seed):
+        """
+            Seed the random generator, two runs with the same seed and inputs are identical.
+        """
+
+        self.cpu.random.seed(seed)
+
+    def startRecording(self, seed = 0):
+        """
+            Seed the random generator and record the keypad state of every frame of the next play.
+        """
+
+        self.setSeed(seed)
+        self.recording = InputRecording(seed, self.scheduler.instructionsPerFrame, InputRecording.hashRom(self.gameData))
+
+    def startReplay(self, recording):
+        """
+            Replay a recording on the next play, the keyboard is ignored.
+        """
+
+        if recording.romHash != InputRecording.hashRom(self.gameData):
+            self.log("The recording was not made with this game.")
+
+        self.setSeed(recording.seed)
+        self.scheduler.instructionsPerFrame = recording.instructionsPerFrame
+        self.replaying = recording
+
+    def enableRewind(self, seconds = 10, maxBytes = 4 * 1024 * 1024):
+        """
+            Keep the last seconds of play to rewind them by holding backspace, using at most maxBytes of memory.
+        """
+
+        self.rewindBuffer = RewindBuffer(seconds * self.scheduler.frameRate, maxBytes)
+
+    def enableProfiler(self, overlay = False):
+        """
+            Start collecting statistics, and draw them over the game when overlay is True.
+        """
+
+        self.profiler = Profiler()
+
+        if overlay:
+            self.dm.overlay = lambda surface: self.profiler.drawOverlay(surface, self.scheduler)
+
+    def disableProfiler(self):
+        self.profiler = None
+        self.dm.overlay = None
+        self.dm.shouldUpdate = True
+
+    def enableDebugger(self, paused = False):
+        """
+            Attach a debugger, in a window its commands are read from the terminal while the game is paused.
+        """
+
+        if self.debugger == None:
+            self.debugger = Debugger()
+
+        if paused:
+            self.debugger.pause()
+
+        return self.debugger
+
+    def readKeys(self):
+        """
+            Update the keypad state for the coming frame.
+        """
+
+        if self.replaying != None:
+            keys = self.replaying.getKeys(self.scheduler.frames)
+        else:
+            keys = self.keypad.readKeys() # Nothing update the keypad when headless, unless set from code
+
+        if self.recording != None:
+            self.recording.record(keys)
+
+        self.cpu.keys = keys
+
+    def play(self, headless = False, cycles = None, frames = None):
+        """
+            Run the loaded game and return the achieved speed statistics.
+
+            - headless: bool, run without opening any window
+            - cycles: int, number of instructions to execute before returning, None to run until the window is closed
+            - frames: int, number of frames to execute before returning, None to run until the window is closed
+        """
+
+        if self.gameData == False:
+            print("No game ROM has been provided")
+            return
+
+        if not self.mem.fillMemory(self.gameData):
+            self.log("Memory overflow error.")
+
+        self.dm.setHeadless(headless)
+        self.dm.invertColors()
+        self.dm.openDisplay()
+
+        self.buzzer = Buzzer(headless)
+
+        self.gameOn = True
+
+        try: # Enable global error handling
+            self.loop(cycles, frames)
+        except UnsupportedInstructionError as error: # The game needs something the emulator cannot do, stop it
+            self.error = str(error)
+
+            if headless:
+                self.log("Game stopped: " + self.error)
+            else:
+                print("Game stopped: " + self.error)
+        except Exception: # If an error occur print: the error code, the Mem vars content and the CPU vars content
+            self.error = traceback.format_exc()
+            self.log("\n" + self.error)
+
+            if self.mem.pc + 1 < len(self.mem.mem):
+                instruction = self.mem.getCurrentInstruction()
+                self.log("Instruction: %04X %s" % (instruction, disassemble(instruction, self.mem.readWord(self.mem.pc + 2))))
+
+            self.log(self.mem)
+            self.log(self.cpu)
+
+        self.buzzer.stop()
+
+        if self.dm.renderer != None:
+            self.log("Renderer: %s" % self.dm.renderer.getStats())
+
+        self.dm.closeDisplay()
+
+        self.log(self.scheduler)
+        self.log("Buzzer: %s" % self.buzzer.getStats())
+
+        return self.scheduler.getStats()
+
+    def step(self, count):
+        """
+            Execute count instructions.
+
+            Instructions are decoded once, the handler with its operands is then reused from the memory code cache
+            until the memory holding the instruction is written.
+        """
+
+        mem = self.mem
+        codeCache = mem.codeCache
+        memory = mem.mem
+        decode = self.cpu.decode
+
+        for _ in range(count):
+            pc = mem.pc
+
+            # Get the handler of the current instruction, decode it on first execution
+            handler = codeCache[pc]
+            if handler is None:
+                handler = codeCache[pc] = decode((memory[pc] << 8) + memory[pc + 1])
+
+            # Execute the instruction
+            handler()
+
+            # Increment the pc if needed
+            if mem.incrementPC:
+                mem.pc += 2
+            else:
+                mem.incrementPC = True
+
+    def stepTranslated(self, count):
+        """
+            Execute count instructions through translated basic blocks. An address is interpreted until it was reached
+            translator.threshold times. A block longer than the instructions left is replaced by the same block cut
+            at that length, translated once and kept with the full block.
+        """
+
+        mem = self.mem
+        blockCache = mem.blockCache
+        blockHits = mem.blockHits
+        translate = self.translator.translate
+        threshold = self.translator.threshold
+
+        while count > 0:
+            pc = mem.pc
+
+            # Get the block starting at the current instruction, translate it once it is hot
+            block = blockCache[pc]
+            if block is None:
+                blockHits[pc] += 1
+                if blockHits[pc] < threshold: # Cold code is interpreted, compiling it would cost more than it saves
+                    self.step(1)
+                    count -= 1
+                    continue
+
+                block = blockCache[pc] = translate(pc)
+
+            run, length, cuts = block
+
+            if length > count: # The block would go past the count, run it cut at the count
+                cut = cuts.get(count)
+                if cut is None:
+                    cut = cuts[count] = translate(pc, count)
+
+                run, length, _ = cut
+
+            if length == 0: # Nothing can be translated here
+                self.step(1)
+                count -= 1
+            else:
+                run()
+                count -= length
+
+    def skipIdleLoop(self, count):
+        """
+            Skip count instructions when the program spins in a loop that cannot exit before the end of the frame,
+            leaving the machine in the state running them would have. Return True when they have been skipped.
+
+            Timers and keys only change between frames, so a jump to itself, a wait on the delay timer
+            (FX07, 3X00, 1NNN back) or a wait on a key (EX9E or EXA1, 1NNN back) stay in the loop for the whole
+            frame once its condition holds when the frame starts.
+        """
+
+        mem = self.mem
+        registers = mem.registers
+        pc = mem.pc
+
+        for start in (pc, pc - 2, pc - 4):
+            first = mem.readWord(start)
+            second = mem.readWord(start + 2)
+            x = (first >> 8) & 0xf
+            phase = (pc - start) // 2 # Position of the pc in the loop
+
+            if (first == 0x1000 | start or first == 0x00FD and self.cpu.platform != "chip8") and phase == 0:
+                return True # Jump to itself or exit instruction, nothing ever change
+
+            if first & 0xf0ff == 0xF007 and second == 0x3000 | (x << 8) and mem.readWord(start + 4) == 0x1000 | start:
+                if mem.dt == 0 or (phase == 1 and registers[x] == 0):
+                    return False # Delay timer elapsed, the loop exit during this frame
+
+                if (3 - phase) % 3 < count: # FX07 is executed at least once
+                    registers[x] = mem.dt
+
+                mem.pc = start + 2 * ((phase + count) % 3)
+                return True
+
+            if first & 0xf0ff in (0xE09E, 0xE0A1) and second == 0x1000 | start and phase <= 1:
+                pressed = (self.cpu.keys >> registers[x]) & 1
+
+                if pressed == (first & 0xff == 0x9E):
+                    return False # The awaited key state is already there, the loop exit during this frame
+
+                mem.pc = start + 2 * ((phase + count) % 2)
+                return True
+
+        return False
+
+    def loop(self, cycles = None, frames = None):
+        scheduler = self.scheduler
+        scheduler.start()
+
+        while self.gameOn:
+            if not self.dm.headless:
+                for event in pygame.event.get():
+                    self.keypad.handleEvent(event)
+
+                    if event.type == pygame.QUIT:
+                        self.gameOn = False
+
+                        self.buzzer.stop()
+                        self.dm.closeDisplay()
+                        pygame.quit()
+                        return
+
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_F3: # Toggle the profiler overlay
+                            if self.profiler == None:
+                                self.enableProfiler(True)
+                            else:
+                                self.disableProfiler()
+
+                        elif self.recording != None:
+                            continue # Hotkeys changing the state are ignored while recording, it only hold the keypad
+
+                        elif event.key == pygame.K_F5: # Quick save
+                            self.quickSave = saveState(self)
+
+                        elif event.key == pygame.K_F9 and self.quickSave != None: # Quick load
+                            loadState(self, self.quickSave)
+
+                        elif event.key == pygame.K_F6: # Break into the debugger
+                            self.enableDebugger(True)
+
+                        elif event.key == pygame.K_BACKSPACE and self.rewindBuffer != None:
+                            self.rewinding = True
+
+                    if event.type == pygame.KEYUP and event.key == pygame.K_BACKSPACE:
+                        self.rewinding = False
+
+            if self.debugger != None and self.debugger.paused and not self.dm.headless:
+                self.debugger.prompt(self) # The window is frozen until the game is resumed
+                continue
+
+            if self.rewinding:
+                # Go back one frame instead of executing one
+                self.rewindBuffer.stepBack(self)
+                self.dm.update()
+                self.buzzer.update(self.mem.st)
+
+                scheduler.endFrame(0)
+                continue
+
+            count = scheduler.instructionsPerFrame
+            if cycles != None:
+                count = min(count, cycles - scheduler.instructions)
+
+            executed, idle = self.runFrame(count)
+
+            # Present the frame buffer and start or stop the sound once per frame
+            self.dm.update()
+            self.updateSound()
+
+            late = scheduler.endFrame(executed, idle)
+
+            if self.profiler != None:
+                self.profiler.endFrame(late)
+
+            if cycles != None and scheduler.instructions >= cycles: self.gameOn = False
+            if frames != None and scheduler.frames >= frames: self.gameOn = False
+
+    def updateSound(self):
+        mem = self.mem
+        self.buzzer.update(mem.st, mem.audioPattern if self.cpu.platform == "xochip" else None, mem.pitch)
+
+    def runFrame(self, count):
+        """
+            Run one frame of count instructions: read the keypad, execute the instructions and decrement the timers
+            when the frame is complete.
+            Return a tuple (number of instructions executed, True when they were skipped because the program was
+            waiting). Fewer than count are executed when the debugger pause the emulation during the frame.
+        """
+
+        if self.debugger != None and self.debugger.paused:
+            return (0, True) # The machine is frozen, timers included
+
+        # Read the keypad once per frame
+        self.readKeys()
+
+        executed = count
+        idle = False
+
+        if self.cpu.waitingKey and not self.cpu.keys:
+            idle = True # FX0A would only execute itself again until the end of the frame
+        elif self.debugger != None and self.debugger.armed:
+            executed = self.debugger.step(self, count)
+        elif self.profiler != None:
+            self.profiler.step(self, count)
+        elif self.skipIdleLoop(count):
+            idle = True
+        elif self.translate:
+            self.stepTranslated(count)
+        else:
+            self.step(count)
+
+        # Timers decrement at 60hz, once per complete frame: the shorter last frame of a run limited by cycles
+        # or a frame paused by the debugger does not count, so the timers never run ahead of the instructions
+        if executed == self.scheduler.instructionsPerFrame:
+            self.mem.decrementTimers()
+
+        if self.rewindBuffer != None:
+            self.rewindBuffer.push(self)
+
+        return (executed, idle)
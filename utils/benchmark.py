@@ -0,0 +1,119 @@
+import os, sys, time, json
+
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+    hasResource = True
+except ImportError: # Not available on Windows, peak memory is not reported there
+    hasResource = False
+
+from utils.inputRecorder import InputRecording
+from utils.batchRunner import createEmu
+
+benchSeed = 1234
+benchCycles = 300000
+
+def scriptedInput(rom, frames, seed = benchSeed, instructionsPerFrame = 9):
+    """
+        Return a recording pressing the keys one after the other, each key is held 10 frames every 30 frames.
+    """
+
+    recording = InputRecording(seed, instructionsPerFrame, InputRecording.hashRom(rom))
+    keys = [0x5, 0x4, 0x6, 0x8, 0x2, 0x1, 0xC, 0xD, 0x7, 0x9, 0xA, 0x0, 0xB, 0xF, 0x3, 0xE]
+
+    for frame in range(frames):
+        recording.record(1 << keys[(frame // 30) % len(keys)] if frame % 30 < 10 else 0)
+
+    return recording
+
+def getPeakMemory():
+    """
+        Return the peak resident memory of the current process in kilobytes, None when unknown.
+    """
+
+    if not hasResource:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak # Bytes on macOS, kilobytes elsewhere
+
+def runBenchmark(path, cycles = benchCycles, translate = False):
+    """
+        Run a ROM headless for a number of cycles with scripted input and a fixed seed, return its measures.
+        Meant to run in a fresh process so the peak memory only account for this ROM.
+    """
+
+    with open(path, "rb") as file:
+        rom = file.read()
+
+    start = time.perf_counter()
+
+    emu = createEmu()
+    emu.translate = translate
+    emu.setRom(rom)
+    emu.startReplay(scriptedInput(rom, cycles // emu.scheduler.instructionsPerFrame + 1))
+
+    stats = emu.play(headless = True, cycles = cycles)
+    startup = emu.scheduler.startTime - start # Until the first frame started, the speed is measured from there
+
+    return {
+        "name": os.path.basename(path),
+        "ips": stats["ips"],
+        "fps": stats["fps"],
+        "startup": startup,
+        "peakMemory": getPeakMemory(),
+        "error": emu.error,
+    }
+
+def runSuite(paths, cycles = benchCycles, translate = False):
+    """
+        Benchmark the ROMs one after the other, each one in its own process.
+    """
+
+    results = {}
+
+    for path in paths:
+        with ProcessPoolExecutor(max_workers = 1) as executor: # A new process for each ROM
+            result = executor.submit(runBenchmark, path, cycles, translate).result()
+
+        results[result["name"]] = result
+
+    return results
+
+def compareResults(results, baseline, threshold = 0.1):
+    """
+        Return the names of the ROMs whose speed dropped by more than threshold compared to the baseline.
+    """
+
+    regressions = []
+
+    for name, result in results.items():
+        if name in baseline and result["ips"] < baseline[name]["ips"] * (1 - threshold):
+            regressions.append(name)
+
+    return regressions
+
+def printResults(results, baseline = {}):
+    print("%-12s %12s %10s %10s %10s" % ("ROM", "instr/s", "frames/s", "startup", "peak KB"))
+
+    for name, result in results.items():
+        line = "%-12s %12.0f %10.0f %9.1fms %10s" % (
+            name, result["ips"], result["fps"], result["startup"] * 1000, result["peakMemory"]
+        )
+
+        if name in baseline:
+            line += "  %+6.1f%%" % (100 * (result["ips"] / baseline[name]["ips"] - 1))
+
+        if result["error"]:
+            line += "  CRASH"
+
+        print(line)
+
+def saveResults(results, path):
+    with open(path, "w") as file:
+        json.dump(results, file, indent = 4)
+
+def loadResults(path):
+    with open(path) as file:
+        return json.load(file)
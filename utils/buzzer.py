@@ -0,0 +1,121 @@
+import array, time
+
+import pygame
+
+class Buzzer:
+    """
+        Buzzer sound while the sound timer is not zero.
+
+        The waveform is generated once and looped on a mixer channel, which is only started and stopped when the
+        sound timer reaches or leaves zero. The mixer plays from its own thread, the emulation never waits for it.
+        XO-CHIP games play their audio pattern at their pitch instead, regenerated only when one of them changes.
+
+        Without a window, or when no audio device is available, nothing is played but the edges are still counted.
+    """
+
+    def __init__(self, headless = False):
+        self.tone = 440 # Frequency of the square wave, in Hz
+        self.volume = 4000 # Amplitude of the samples, out of 32767
+        self.bufferSize = 256 # Mixer buffer in samples, the output latency is bufferSize / frequency
+
+        self.playing = False
+        self.pattern = None # Audio pattern and pitch of the sound being played, None for the square wave
+        self.edges = 0 # Number of starts and stops
+        self.maxSwitchTime = 0.0 # Longest start or stop call, in seconds
+
+        self.channel: pygame.mixer.Channel | None = None
+        self.square: pygame.mixer.Sound | None = None
+
+        if not headless:
+            self.open()
+
+    def open(self):
+        try:
+            if pygame.mixer.get_init():
+                pygame.mixer.quit() # Opened by pygame.init with a larger buffer
+
+            pygame.mixer.init(44100, -16, 1, self.bufferSize)
+        except pygame.error: # No audio device, keep the null sink
+            return
+
+        self.frequency, _, self.channels = pygame.mixer.get_init()
+        self.outputLatency = self.bufferSize / self.frequency
+
+        period = round(self.frequency / self.tone)
+        self.square = self.makeSound([self.volume] * (period // 2) + [-self.volume] * (period - period // 2))
+        self.channel = pygame.mixer.Channel(0)
+
+    def makeSound(self, samples):
+        """
+            Return a sound of the mono samples, duplicated on each channel of the mixer.
+        """
+
+        data = array.array("h", (sample for sample in samples for _ in range(self.channels)))
+
+        return pygame.mixer.Sound(buffer = data.tobytes())
+
+    def makePatternSound(self, pattern, pitch):
+        """
+            Return the sound of an XO-CHIP audio pattern: 128 bits played at 4000 * 2 ** ((pitch - 64) / 48) bits
+            per second, resampled to the mixer frequency.
+        """
+
+        rate = 4000 * 2 ** ((pitch - 64) / 48)
+        length = max(1, round(128 * self.frequency / rate))
+        bits = int.from_bytes(pattern, "big")
+
+        return self.makeSound(
+            self.volume if (bits >> (127 - int(j * rate / self.frequency) % 128)) & 1 else -self.volume
+            for j in range(length)
+        )
+
+    def update(self, soundTimer, pattern = None, pitch = 64):
+        """
+            Start or stop the sound, once per frame after the timers are decremented.
+
+            - pattern: XO-CHIP audio pattern, None or all zeros to play the square wave
+        """
+
+        playing = soundTimer > 0
+
+        if not playing and not self.playing:
+            return
+
+        key = (bytes(pattern), pitch) if playing and pattern != None and any(pattern) else None
+
+        if playing and self.playing and key == self.pattern:
+            return
+
+        start = time.perf_counter()
+
+        if self.channel != None:
+            if not playing:
+                self.channel.stop()
+            elif key == None:
+                self.channel.play(self.square, loops = -1)
+            else:
+                self.channel.play(self.makePatternSound(*key), loops = -1)
+
+        self.maxSwitchTime = max(self.maxSwitchTime, time.perf_counter() - start)
+        self.edges += playing != self.playing
+
+        self.playing = playing
+        self.pattern = key
+
+    def stop(self):
+        self.update(0)
+
+    def getStats(self):
+        """
+            Return the number of edges and the worst start or stop latency, in seconds: the time spent starting or
+            stopping the channel plus the output latency of the mixer buffer.
+        """
+
+        outputLatency = self.outputLatency if self.channel != None else 0.0
+
+        return {
+            "edges": self.edges,
+            "maxSwitchTime": self.maxSwitchTime,
+            "outputLatency": outputLatency,
+            "maxLatency": self.maxSwitchTime + outputLatency,
+        }
@@ -0,0 +1,277 @@
+import inspect
+
+from utils.disassembler import disassembleRange
+
+class Debugger:
+    """
+        Debugger stop the emulation on breakpoints and watchpoints, and step through the program.
+
+        While it has nothing to check the emulator run its usual loops, the debugger cost nothing. Once a breakpoint,
+        a watchpoint or a run-to target is set, instructions are run through Debugger.step, an interpreter loop
+        checking them before and after each instruction. While paused the machine is frozen, timers included.
+
+        - breakpoints: addresses stopping the emulation before their instruction is executed
+        - watchpoints: "v0" to "vf", "i" or memory addresses, stopping the emulation after their value changed
+    """
+
+    def __init__(self):
+        self.breakpoints: set[int] = set()
+        self.watchpoints: dict[str | int, int] = {} # Last known value of each watched target
+
+        self.runTo: int | None = None # Address to stop at once, set by step over and run to
+        self.runToDepth: int | None = None # Stack depth runTo must be reached at, None for any depth
+
+        self.paused = False
+        self.reason = "" # Why the emulation was last paused
+        self.skipBreakpoint = False # Set on resume, the instruction the emulation stopped on is executed first
+
+        self.armed = False # Set while instructions must be run through Debugger.step
+
+    def rearm(self):
+        self.armed = bool(self.breakpoints or self.watchpoints or self.runTo != None or self.paused)
+
+    def pause(self, reason = "paused"):
+        self.paused = True
+        self.reason = reason
+        self.runTo = self.runToDepth = None
+
+        self.rearm()
+
+    def resume(self):
+        self.paused = False
+        self.skipBreakpoint = True
+
+        self.rearm()
+
+    def addBreakpoint(self, address):
+        self.breakpoints.add(address)
+        self.rearm()
+
+    def removeBreakpoint(self, address):
+        self.breakpoints.discard(address)
+        self.rearm()
+
+    def addWatchpoint(self, emu, target):
+        """
+            Watch a register, "v0" to "vf" or "i", or a memory address.
+        """
+
+        self.watchpoints[target] = self.readTarget(emu, target)
+        self.rearm()
+
+    def removeWatchpoint(self, target):
+        self.watchpoints.pop(target, None)
+        self.rearm()
+
+    @staticmethod
+    def readTarget(emu, target):
+        if isinstance(target, int):
+            return emu.mem.mem[target]
+
+        if target == "i":
+            return emu.mem.i
+
+        return emu.mem.registers[int(target[1:], 16)]
+
+    def runToAddress(self, address, depth = None):
+        """
+            Resume and stop when the pc reach address, at the given stack depth unless None.
+        """
+
+        self.resume()
+
+        self.runTo = address
+        self.runToDepth = depth
+
+        self.rearm()
+
+    def stepInstruction(self, emu):
+        """
+            Execute the instruction at the pc, timers are not decremented.
+        """
+
+        emu.step(1)
+        self.pause("step")
+
+    def stepOver(self, emu):
+        """
+            Like stepInstruction, but a subroutine call is run until it returns.
+        """
+
+        mem = emu.mem
+
+        if mem.readWord(mem.pc) >> 12 == 0x2:
+            self.runToAddress(mem.pc + 2, mem.sp)
+        else:
+            self.stepInstruction(emu)
+
+    def step(self, emu, count):
+        """
+            Execute count instructions like Emu.step, checking the breakpoints and watchpoints,
+            until the emulation is paused. Return the number of instructions executed.
+        """
+
+        mem = emu.mem
+        codeCache = mem.codeCache
+        memory = mem.mem
+        decode = emu.cpu.decode
+
+        breakpoints = self.breakpoints
+        watchpoints = self.watchpoints
+
+        for executed in range(count):
+            pc = mem.pc
+
+            if pc in breakpoints or (pc == self.runTo and self.runToDepth in (None, mem.sp)):
+                if not self.skipBreakpoint:
+                    self.pause("breakpoint at 0x%03X" % pc if pc in breakpoints else "reached 0x%03X" % pc)
+                    return executed
+
+            self.skipBreakpoint = False
+
+            handler = codeCache[pc]
+            if handler is None:
+                handler = codeCache[pc] = decode((memory[pc] << 8) + memory[pc + 1])
+
+            handler()
+
+            if mem.incrementPC:
+                mem.pc += 2
+            else:
+                mem.incrementPC = True
+
+            if watchpoints:
+                changes = []
+
+                for target, value in watchpoints.items():
+                    newValue = self.readTarget(emu, target)
+
+                    if newValue != value:
+                        watchpoints[target] = newValue
+                        changes.append("%s: 0x%02X -> 0x%02X" % (self.formatTarget(target), value, newValue))
+
+                if changes:
+                    self.pause("watchpoint at 0x%03X, %s" % (pc, ", ".join(changes)))
+                    return executed + 1
+
+        return count
+
+    @staticmethod
+    def formatTarget(target):
+        return "0x%03X" % target if isinstance(target, int) else target.upper()
+
+    def formatRegisters(self, emu):
+        mem = emu.mem
+
+        return "\n".join([
+            " ".join("V%X=%02X" % (x, value) for x, value in enumerate(mem.registers[:8])),
+            " ".join("V%X=%02X" % (x + 8, value) for x, value in enumerate(mem.registers[8:])),
+            "PC=%03X I=%03X SP=%d DT=%02X ST=%02X" % (mem.pc, mem.i, mem.sp, mem.dt, mem.st),
+        ])
+
+    def formatStack(self, emu):
+        mem = emu.mem
+
+        if mem.sp == 0:
+            return "Stack: empty"
+
+        return "Stack: " + " ".join("%03X" % address for address in mem.stack[:mem.sp])
+
+    def formatMemory(self, emu, address, length = 64):
+        memory = emu.mem.mem
+        lines = []
+
+        for start in range(address, min(address + length, len(memory)), 16):
+            row = memory[start:min(start + 16, address + length)]
+            lines.append("%04X  %s" % (start, " ".join("%02X" % value for value in row)))
+
+        return "\n".join(lines)
+
+    def formatDisassembly(self, emu, address = None, count = 10):
+        """
+            Return the assembly of count instructions from address, from the pc when None.
+            The pc is marked with >, breakpoints with *.
+        """
+
+        pc = emu.mem.pc
+        address = pc if address == None else address
+
+        return "\n".join(
+            "%s%s %04X  %04X  %s" % (">" if line == pc else " ", "*" if line in self.breakpoints else " ", line, instruction, text)
+            for line, instruction, text in disassembleRange(emu.mem.mem, address, count)
+        )
+
+    def formatState(self, emu):
+        return "\n".join([self.reason, self.formatRegisters(emu), self.formatStack(emu), self.formatDisassembly(emu, count = 5)])
+
+    def prompt(self, emu):
+        """
+            Read debugger commands from the terminal until the emulation is resumed. Commands:
+
+            - s: step, n: step over, c: continue, u address: run to address
+            - b address: add a breakpoint, d address: delete it
+            - w v0-vf|i|address: add a watchpoint, uw target: remove it
+            - r: registers and stack, x address [length]: memory, l [address] [count]: disassembly
+            - q: quit the game
+        """
+
+        print(self.formatState(emu))
+
+        while self.paused:
+            try:
+                words = input("(debug) ").split()
+            except EOFError:
+                words = ["q"]
+
+            if not words:
+                continue
+
+            command, arguments = words[0], words[1:]
+
+            try:
+                if command == "s":
+                    self.stepInstruction(emu)
+                    emu.dm.update()
+                    print(self.formatState(emu))
+                elif command == "n":
+                    self.stepOver(emu)
+                    emu.dm.update()
+
+                    if self.paused:
+                        print(self.formatState(emu))
+                elif command == "c":
+                    self.resume()
+                elif command == "u":
+                    self.runToAddress(int(arguments[0], 16))
+                elif command == "b":
+                    self.addBreakpoint(int(arguments[0], 16))
+                elif command == "d":
+                    self.removeBreakpoint(int(arguments[0], 16))
+                elif command == "w":
+                    self.addWatchpoint(emu, self.parseTarget(arguments[0]))
+                elif command == "uw":
+                    self.removeWatchpoint(self.parseTarget(arguments[0]))
+                elif command == "r":
+                    print(self.formatRegisters(emu))
+                    print(self.formatStack(emu))
+                elif command == "x":
+                    print(self.formatMemory(emu, int(arguments[0], 16), int(arguments[1]) if len(arguments) >= 2 else 64))
+                elif command == "l":
+                    address = int(arguments[0], 16) if arguments else None
+                    print(self.formatDisassembly(emu, address, int(arguments[1]) if len(arguments) >= 2 else 10))
+                elif command == "q":
+                    self.resume()
+                    emu.gameOn = False
+                else:
+                    print(inspect.cleandoc(self.prompt.__doc__ or ""))
+            except (IndexError, ValueError):
+                print("Invalid arguments:", " ".join(words))
+
+    @staticmethod
+    def parseTarget(text):
+        text = text.lower()
+
+        if text == "i" or (len(text) == 2 and text[0] == "v" and text[1] in "0123456789abcdef"):
+            return text
+
+        return int(text, 16)
@@ -0,0 +1,100 @@
+zeroMnemonics = {
+    0x00E0: "CLS",
+    0x00EE: "RET",
+    0x00FB: "SCR",
+    0x00FC: "SCL",
+    0x00FD: "EXIT",
+    0x00FE: "LOW",
+    0x00FF: "HIGH",
+}
+
+fiveMnemonics = {0x0: "SE", 0x2: "SAVE", 0x3: "LOAD"} # XO-CHIP SAVE and LOAD act on the registers vx to vy
+
+eightMnemonics = {
+    0x0: "LD",
+    0x1: "OR",
+    0x2: "AND",
+    0x3: "XOR",
+    0x4: "ADD",
+    0x5: "SUB",
+    0x6: "SHR",
+    0x7: "SUBN",
+    0xE: "SHL",
+}
+
+fMnemonics = {
+    0x01: "PLANE %d",
+    0x07: "LD V%X, DT",
+    0x0A: "LD V%X, K",
+    0x15: "LD DT, V%X",
+    0x18: "LD ST, V%X",
+    0x1E: "ADD I, V%X",
+    0x29: "LD F, V%X",
+    0x30: "LD HF, V%X",
+    0x33: "LD B, V%X",
+    0x3A: "PITCH V%X",
+    0x55: "LD [I], V%X",
+    0x65: "LD V%X, [I]",
+    0x75: "LD R, V%X",
+    0x85: "LD V%X, R",
+}
+
+def disassemble(instruction, nextWord = 0):
+    """
+        Return the assembly of an instruction, e.g. "ADD V1, 0x10", "DW 0x5AB1" when it is not an instruction.
+
+        - nextWord: word following the instruction, the address loaded by the XO-CHIP F000 NNNN instruction
+    """
+
+    code = instruction >> 12
+    x = (instruction >> 8) & 0xf
+    y = (instruction >> 4) & 0xf
+    n = instruction & 0xf
+    nn = instruction & 0xff
+    nnn = instruction & 0xfff
+
+    if code == 0x0:
+        if instruction & 0xfff0 == 0x00C0: return "SCD %d" % n
+        if instruction & 0xfff0 == 0x00D0: return "SCU %d" % n
+
+        return zeroMnemonics.get(instruction, "SYS 0x%03X" % nnn)
+
+    if code == 0x1: return "JP 0x%03X" % nnn
+    if code == 0x2: return "CALL 0x%03X" % nnn
+    if code == 0x3: return "SE V%X, 0x%02X" % (x, nn)
+    if code == 0x4: return "SNE V%X, 0x%02X" % (x, nn)
+    if code == 0x5 and n in fiveMnemonics: return "%s V%X, V%X" % (fiveMnemonics[n], x, y)
+    if code == 0x6: return "LD V%X, 0x%02X" % (x, nn)
+    if code == 0x7: return "ADD V%X, 0x%02X" % (x, nn)
+    if code == 0x8 and n in eightMnemonics: return "%s V%X, V%X" % (eightMnemonics[n], x, y)
+    if code == 0x9 and n == 0: return "SNE V%X, V%X" % (x, y)
+    if code == 0xA: return "LD I, 0x%03X" % nnn
+    if code == 0xB: return "JP V0, 0x%03X" % nnn
+    if code == 0xC: return "RND V%X, 0x%02X" % (x, nn)
+    if code == 0xD: return "DRW V%X, V%X, %d" % (x, y, n)
+    if code == 0xE and nn == 0x9E: return "SKP V%X" % x
+    if code == 0xE and nn == 0xA1: return "SKNP V%X" % x
+    if instruction == 0xF000: return "LD I, long 0x%04X" % nextWord
+    if code == 0xF and nn == 0x02: return "AUDIO"
+    if code == 0xF and nn in fMnemonics: return fMnemonics[nn] % x
+
+    return "DW 0x%04X" % instruction
+
+def instructionLength(instruction):
+    return 4 if instruction == 0xF000 else 2
+
+def disassembleRange(memory, address, count):
+    """
+        Return the address, the instruction and its assembly of count instructions from address.
+    """
+
+    lines = []
+
+    while len(lines) < count and address + 1 < len(memory):
+        instruction = (memory[address] << 8) + memory[address + 1]
+        nextWord = (memory[address + 2] << 8) + memory[address + 3] if address + 3 < len(memory) else 0
+
+        lines.append((address, instruction, disassemble(instruction, nextWord)))
+        address += instructionLength(instruction)
+
+    return lines
@@ -1,86 +1,288 @@
 import pygame
-import time
+
+from utils.frameBuffer import FrameBuffer
+from utils.renderer import Renderer
 
 class DisplayManager:
     """
         Display manager control everything related to the display
     """
 
-    instance: object | None = None
-
-    @staticmethod
-    def getInstance() -> object:
-        """
-            Static function to allow to be used as a singleton.
-        """
-
-        if DisplayManager.instance == None: DisplayManager.instance = DisplayManager()
-        return DisplayManager.instance
-    
     def __init__(self):
         self.reset()
 
-        pygame.init()
-
     def reset(self):
         self.height = 640
         self.width = 1280
 
-        self.pixelHeight = 20
-        self.pixelWidth = 20
-
         self.invert = False
         self.shouldUpdate = False
         self.display = False
+        self.headless = False # When headless, the frame buffer is never presented and no window is opened
+        self.threaded = True # Present the frames from a render thread, see utils/renderer.py
+        self.renderer: Renderer | None = None # Render thread, running while the window is open when threaded
+
+        self.setSpriteMode("wrapX")
+        self.secondPlane: FrameBuffer | None = None # XO-CHIP second bitplane, created when first selected
+        self.planeMask = 1 # Bitplanes drawn, cleared and scrolled: 1 the frame buffer, 2 the second plane, 3 both
+        self.setResolution(64, 32)
+
+        self.scaling = "integer" # "integer" keep sharp pixels, "smooth" blend them when scaled to the window
+        self.setPhosphorDecay(0) # Part of its brightness a turned off pixel keep each frame, 0 to disable the effect
+        self.phosphor: bytes | None = None # Brightness of each pixel on the last presented frame
+        self.fading = False # Set while some turned off pixels are still visible
+        self.overlay = None # Function drawing over the window each frame, the whole window is then presented
+
+        self.palettes = {
+            "classic": ((255, 255, 255), (0, 0, 0)),
+            "amber": ((40, 20, 0), (255, 176, 0)),
+            "green": ((0, 32, 0), (51, 255, 51)),
+        }
 
-        self.white = (255, 255, 255)
-        self.black = (0, 0, 0)
+        self.planeColors = ((255, 102, 0), (102, 34, 0)) # Pixels lit only on the second plane, and on both planes
+
+        self.setPalette("classic")
+
+    def setHeadless(self, headless):
+        self.headless = headless
+
+    def setPalette(self, name):
+        """
+            Use one of the palettes, white is the background color and black the color of lit pixels.
+        """
+
+        self.white, self.black = self.palettes[name]
+        if self.invert: self.white, self.black = self.black, self.white
+
+        self.updatePalette()
 
     def invertColors(self):
         self.invert = not self.invert
+        self.white, self.black = self.black, self.white
+
+        self.updatePalette()
+
+    def updatePalette(self):
+        """
+            Build the 256 colors palette of the 8-bit surface, from the background (0) to lit pixels (255).
+            With two bitplanes, pixels are 0x55 when lit on the first plane, 0xAA on the second and 0xFF on both.
+        """
 
-        self.white = (255, 255, 255) if not self.invert else (0, 0, 0)
-        self.black = (0, 0, 0) if not self.invert else (255, 255, 255)
+        self.palette = [
+            tuple(background + (foreground - background) * level // 255 for background, foreground in zip(self.white, self.black))
+            for level in range(256)
+        ]
 
-        if self.display != False:
-            self.clear()
+        self.planePalette = list(self.palette)
+        self.planePalette[0x55] = self.black
+        self.planePalette[0xAA], self.planePalette[0xFF] = self.planeColors
+
+        self.shouldUpdate = True
+
+    def setSpriteMode(self, mode):
+        """
+            Choose how sprites crossing the screen edges are drawn: "clip", "wrapX" or "wrap", see utils/quirks.py.
+        """
+
+        self.spriteDrawer = {
+            "clip": FrameBuffer.drawSpriteClipped,
+            "wrapX": FrameBuffer.drawSprite,
+            "wrap": FrameBuffer.drawSpriteWrapped,
+        }[mode]
+
+    def setResolution(self, width, height):
+        """
+            Replace the screen by a blank one of width x height pixels, scaled to the same window size.
+        """
+
+        self.frameBuffer = FrameBuffer(width, height)
+        if self.secondPlane != None:
+            self.secondPlane = FrameBuffer(width, height)
+
+        self.pixelWidth = self.width // width
+        self.pixelHeight = self.height // height
+
+        self.setPlanes(self.planeMask)
+
+        self.phosphor = None
+        self.shouldUpdate = True
+
+    def setPlanes(self, mask):
+        """
+            Select the bitplanes the next draw, clear and scroll operations apply to.
+        """
+
+        if mask & 2 and self.secondPlane == None:
+            self.secondPlane = FrameBuffer(self.frameBuffer.width, self.frameBuffer.height)
+            self.shouldUpdate = True
+
+        self.planeMask = mask
+        self.planes = [plane for bit, plane in ((1, self.frameBuffer), (2, self.secondPlane)) if mask & bit]
+        self.planeCount = len(self.planes) # Sprites hold one block of rows per selected plane
+
+    def getResolution(self):
+        return (self.frameBuffer.width, self.frameBuffer.height)
+
+    def setPhosphorDecay(self, decay):
+        self.phosphorDecay = decay
+        self.decayTable = bytes(int(level * decay) for level in range(256))
 
     def openDisplay(self):
+        if self.headless:
+            return
+
+        pygame.init()
         self.display = pygame.display.set_mode((self.width, self.height))
-        self.clear()
 
         self.shouldUpdate = True
         self.update()
 
+        if self.threaded:
+            self.renderer = Renderer(self)
+            self.renderer.start()
+
+    def closeDisplay(self):
+        """
+            Stop the render thread, must be called before pygame.quit.
+        """
+
+        if self.renderer != None:
+            self.renderer.stop()
+            self.renderer = None
+
     def clear(self):
-        self.display.fill(self.white)
+        for plane in self.planes:
+            plane.clear()
 
     def getPixel(self, x, y):
-        pixel_color = self.display.get_at((x, y))
+        return self.frameBuffer.getPixel(x, y)
+
+    def drawSprite(self, gameX, gameY, sprite, spriteWidth = 8):
+        """
+            Draw a sprite on the selected planes, each plane take its own part of the sprite data, in order.
+        """
+
+        planes = self.planes
+
+        if len(planes) == 1:
+            return self.spriteDrawer(planes[0], gameX, gameY, sprite, spriteWidth)
+
+        size = len(sprite) // len(planes) if planes else 0
+        collision = 0
+
+        for index, plane in enumerate(planes):
+            collision |= self.spriteDrawer(plane, gameX, gameY, sprite[index * size:(index + 1) * size], spriteWidth)
+
+        return collision
+
+    def scrollDown(self, n):
+        for plane in self.planes:
+            plane.scrollDown(n)
+
+    def scrollUp(self, n):
+        for plane in self.planes:
+            plane.scrollUp(n)
+
+    def scrollRight(self, n):
+        for plane in self.planes:
+            plane.scrollRight(n)
+
+    def scrollLeft(self, n):
+        for plane in self.planes:
+            plane.scrollLeft(n)
+
+    def applyPhosphor(self, pixels):
+        """
+            Blend the pixels with the decayed brightness of the previous frame.
+        """
+
+        if self.phosphor == None or len(self.phosphor) != len(pixels):
+            blended = pixels
+        else:
+            # Lit pixels are 255, so OR keep them lit and keep the decayed brightness of the others
+            decayed = self.phosphor.translate(self.decayTable)
+            blended = (int.from_bytes(decayed, "big") | int.from_bytes(pixels, "big")).to_bytes(len(pixels), "big")
 
-        if pixel_color[:3] == self.white: return 0
-        else: return 1
+        self.phosphor = blended
+        self.fading = blended != pixels
 
-    def drawPixel(self, gameX, gameY, colorMode):
-        if gameX >= 64:
-            gameX = gameX % 64
+        return blended
 
-        if gameY >= 32:
-            return 0
+    def render(self):
+        """
+            Return the frame buffer scaled to the window size.
+
+            The frame buffer is written at native size into an 8-bit surface in one operation, then scaled once.
+        """
+
+        frameBuffer = self.frameBuffer
+        palette = self.palette
+
+        pixels = frameBuffer.toPixels()
+
+        if self.secondPlane != None:
+            # Keep the bits 0x55 of the first plane pixels and 0xAA of the second plane pixels
+            low = int.from_bytes(b"\x55" * len(pixels), "big")
+            pixels = (
+                (int.from_bytes(pixels, "big") & low) | (int.from_bytes(self.secondPlane.toPixels(), "big") & (low << 1))
+            ).to_bytes(len(pixels), "big")
 
-        screenX = gameX * self.pixelWidth
-        screenY = gameY * self.pixelHeight
+            palette = self.planePalette
+        elif self.phosphorDecay > 0:
+            pixels = self.applyPhosphor(pixels)
 
-        actPixel = self.getPixel(screenX, screenY)
-        newColor = self.black if actPixel ^ int(colorMode) else self.white # XOR
+        surface = pygame.image.frombuffer(pixels, (frameBuffer.width, frameBuffer.height), "P")
+        surface.set_palette(palette)
 
-        pygame.draw.rect(self.display, newColor, (screenX, screenY, self.pixelWidth, self.pixelHeight))
+        size = (frameBuffer.width * self.pixelWidth, frameBuffer.height * self.pixelHeight)
 
-        if actPixel == 1 and newColor == self.white:
-            return 1
-        else: return 0
+        if self.scaling == "smooth":
+            return pygame.transform.smoothscale(surface.convert(24), size)
+
+        return pygame.transform.scale(surface, size)
+
+    def scaleRect(self, rect):
+        return pygame.Rect(rect[0] * self.pixelWidth, rect[1] * self.pixelHeight, rect[2] * self.pixelWidth, rect[3] * self.pixelHeight)
 
     def update(self):
-        if self.shouldUpdate:
+        """
+            Present the frame buffer, should be called once per frame.
+            When the render thread is running the frame is only published to it, and presented by it.
+
+            Only the parts of the window that changed since the last presented frame are sent to the screen,
+            nothing is done when the frame did not change. Set shouldUpdate to redraw the whole window.
+        """
+
+        if self.headless:
+            return
+
+        if self.renderer != None:
+            self.renderer.publish()
+            return
+
+        if self.shouldUpdate or self.fading or self.overlay != None:
+            self.display.blit(self.render(), (0, 0))
+            self.frameBuffer.markPresented()
+
+            if self.secondPlane != None:
+                self.secondPlane.markPresented()
+
+            if self.overlay != None:
+                self.overlay(self.display)
+
             pygame.display.flip()
-            self.shouldUpdate = False
+        else:
+            rects = self.frameBuffer.getDamage()
+            if self.secondPlane != None:
+                rects += self.secondPlane.getDamage()
+
+            if rects:
+                rendered = self.render()
+                scaledRects = [self.scaleRect(rect) for rect in rects]
+
+                for rect in scaledRects:
+                    self.display.blit(rendered, rect, rect)
+
+                pygame.display.update(scaledRects)
+
+        self.shouldUpdate = False
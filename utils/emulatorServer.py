@@ -0,0 +1,318 @@
+import asyncio, base64, json, time, traceback
+
+from emu import Emu
+from utils.localDataManager import getLibrary
+from utils.saveState import saveState, loadState
+from utils.scheduler import Scheduler
+from utils.frameStream import FrameEncoder, writeStreamHeader
+from utils.errors import UnsupportedInstructionError
+
+class Instance:
+    """
+        Instance is one machine of the emulator server, running headless at its own frame rate.
+    """
+
+    def __init__(self, identifier, emu, name):
+        self.id = identifier
+        self.emu = emu
+        self.name = name
+
+        self.paused = False
+        self.task: asyncio.Task | None = None # Task running the frames of the instance
+        self.busyTime = 0.0 # Host time spent executing this instance, in seconds
+
+    def runFrame(self):
+        """
+            Run one frame and return the time left until the next one, negative when the instance is late.
+        """
+
+        emu = self.emu
+        scheduler = emu.scheduler
+
+        start = time.perf_counter()
+
+        try:
+            executed, idle = emu.runFrame(scheduler.instructionsPerFrame)
+        except UnsupportedInstructionError as error: # The game cannot run further, keep it paused with the reason
+            emu.error = str(error)
+            self.paused = True
+            executed, idle = 0, False
+        except Exception: # The game crashed, keep it paused for inspection
+            emu.error = traceback.format_exc()
+            self.paused = True
+            executed, idle = 0, False
+
+        self.busyTime += time.perf_counter() - start
+
+        return scheduler.nextDelay(executed, idle)
+
+    def getStats(self):
+        stats = self.emu.scheduler.getStats()
+
+        stats.update({
+            "id": self.id,
+            "name": self.name,
+            "paused": self.paused,
+            "busyTime": self.busyTime,
+            "load": self.busyTime / stats["elapsed"] if stats["elapsed"] > 0 else 0, # Share of one host core used
+            "error": self.emu.error,
+        })
+
+        return stats
+
+class EmulatorServer:
+    """
+        Emulator server run many independent machines cooperatively on one asyncio event loop,
+        controlled by clients through a local socket.
+
+        Each instance run in its own task: one frame of instructionsPerFrame instructions, then the task sleep until
+        its next frame boundary. Late instances only yield between frames, so every instance get its frame budget
+        in turn and none can starve the others.
+
+        Clients send one JSON request per line and receive one JSON response per line, e.g.
+        {"command": "start", "game": "PONG"} -> {"ok": true, "id": 1}. Errors are returned as
+        {"ok": false, "error": "..."}. Binary data (ROMs, snapshots, frame buffers) is base64 encoded.
+
+        - start: game (name in the library) or rom, [seed], [instructionsPerFrame], [frameRate], [paused], [quirks] -> id
+        - stop, pause, resume: id
+        - step: id, [frames] -> run frames of a paused instance right away
+        - input: id, keys (16 bits keypad mask) or press / release (key number)
+        - snapshot: id -> state, restore: id, state
+        - framebuffer: id -> width, height, data (packed rows)
+        - stats: [id] -> stats of one instance, or of all of them in instances
+        - stream: id -> after the response the connection only carry the frame stream of the instance,
+          see utils/frameStream.py
+    """
+
+    def __init__(self, maxInstances = 64):
+        self.maxInstances = maxInstances
+
+        self.instances: dict[int, Instance] = {}
+        self.nextId = 1
+
+        self.commands = {
+            "start": self.commandStart,
+            "stop": self.commandStop,
+            "pause": self.commandPause,
+            "resume": self.commandResume,
+            "step": self.commandStep,
+            "input": self.commandInput,
+            "snapshot": self.commandSnapshot,
+            "restore": self.commandRestore,
+            "framebuffer": self.commandFramebuffer,
+            "stats": self.commandStats,
+            "stream": self.commandStream,
+        }
+
+    def start(self, rom, name = "", seed = None, instructionsPerFrame = 9, frameRate = 60, paused = False, quirks = None):
+        """
+            Create an instance running the ROM and schedule it on the event loop.
+        """
+
+        if len(self.instances) >= self.maxInstances:
+            raise ValueError("Too many instances, at most %d" % self.maxInstances)
+
+        emu = Emu()
+        emu.dm.setHeadless(True)
+        emu.scheduler = Scheduler(frameRate, instructionsPerFrame)
+        emu.setRom(rom, quirks = quirks)
+
+        if seed != None:
+            emu.setSeed(seed)
+
+        if not emu.mem.fillMemory(rom):
+            raise ValueError("The ROM does not fit in memory")
+
+        instance = Instance(self.nextId, emu, name)
+        instance.paused = paused
+        instance.task = asyncio.get_running_loop().create_task(self.runInstance(instance))
+
+        self.instances[instance.id] = instance
+        self.nextId += 1
+
+        return instance
+
+    def stop(self, instance):
+        if instance.task != None:
+            instance.task.cancel()
+
+        del self.instances[instance.id]
+
+    async def runInstance(self, instance):
+        scheduler = instance.emu.scheduler
+        scheduler.start()
+
+        while True:
+            if instance.paused:
+                await asyncio.sleep(scheduler.frameDuration)
+                scheduler.nextFrameTime = time.perf_counter() # Do not catch up the paused time
+                continue
+
+            await asyncio.sleep(max(instance.runFrame(), 0))
+
+    def getInstance(self, request):
+        instance = self.instances.get(request.get("id"))
+
+        if instance == None:
+            raise ValueError("Unknown instance: %s" % request.get("id"))
+
+        return instance
+
+    def commandStart(self, request):
+        if "rom" in request:
+            rom = base64.b64decode(request["rom"])
+            name = request.get("name", "")
+            quirks = request.get("quirks")
+        else:
+            library = getLibrary()
+            name = request.get("game")
+
+            if not library.has(name):
+                raise ValueError("Unknown game: %s" % name)
+
+            rom = library.getRom(name)
+            quirks = request.get("quirks") or library.getEntry(name).get("quirks")
+
+        instance = self.start(
+            rom, name, request.get("seed"),
+            request.get("instructionsPerFrame", 9), request.get("frameRate", 60), request.get("paused", False),
+            quirks
+        )
+
+        return {"id": instance.id}
+
+    def commandStop(self, request):
+        self.stop(self.getInstance(request))
+        return {}
+
+    def commandPause(self, request):
+        self.getInstance(request).paused = True
+        return {}
+
+    def commandResume(self, request):
+        instance = self.getInstance(request)
+
+        instance.paused = False
+        instance.emu.error = None
+
+        return {}
+
+    def commandStep(self, request):
+        instance = self.getInstance(request)
+
+        if not instance.paused:
+            raise ValueError("Only paused instances can be stepped")
+
+        for _ in range(request.get("frames", 1)):
+            instance.runFrame()
+
+        return {"frames": instance.emu.scheduler.frames}
+
+    def commandInput(self, request):
+        keypad = self.getInstance(request).emu.keypad
+
+        if "keys" in request: keypad.setKeys(request["keys"] & 0xffff)
+        if "press" in request: keypad.press(request["press"] & 0xf)
+        if "release" in request: keypad.release(request["release"] & 0xf)
+
+        return {}
+
+    def commandSnapshot(self, request):
+        return {"state": base64.b64encode(saveState(self.getInstance(request).emu)).decode()}
+
+    def commandRestore(self, request):
+        loadState(self.getInstance(request).emu, base64.b64decode(request["state"]))
+        return {}
+
+    def commandFramebuffer(self, request):
+        frameBuffer = self.getInstance(request).emu.dm.frameBuffer
+
+        return {
+            "width": frameBuffer.width,
+            "height": frameBuffer.height,
+            "data": base64.b64encode(frameBuffer.toBytes()).decode(),
+        }
+
+    def commandStats(self, request):
+        if "id" in request:
+            return self.getInstance(request).getStats()
+
+        return {"instances": [instance.getStats() for instance in self.instances.values()]}
+
+    def commandStream(self, request):
+        return {"stream": self.getInstance(request).id}
+
+    async def streamFrames(self, instance, writer):
+        """
+            Send the frame stream of an instance until it is stopped. The frame buffer is checked once per frame,
+            while the client is slow to read the intermediate frames are skipped.
+        """
+
+        encoder = FrameEncoder()
+        writeStreamHeader(writer)
+
+        while instance.id in self.instances:
+            message = encoder.encode(instance.emu.dm.frameBuffer, instance.emu.scheduler.frames)
+
+            if message != None:
+                writer.write(message)
+                await writer.drain()
+
+            await asyncio.sleep(instance.emu.scheduler.frameDuration)
+
+    def handleRequest(self, line):
+        """
+            Execute a request line and return the response.
+        """
+
+        try:
+            request = json.loads(line)
+            command = self.commands.get(request.get("command"))
+
+            if command == None:
+                raise ValueError("Unknown command: %s" % request.get("command"))
+
+            response = command(request)
+        except Exception as error:
+            return {"ok": False, "error": str(error) or type(error).__name__}
+
+        response["ok"] = True
+
+        return response
+
+    async def handleClient(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                response = self.handleRequest(line)
+
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+                if "stream" in response:
+                    await self.streamFrames(self.instances[response["stream"]], writer)
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host = "127.0.0.1", port = 8642, path = None):
+        """
+            Accept clients until cancelled, on a unix socket when path is given, else on a local TCP port.
+        """
+
+        if path != None:
+            server = await asyncio.start_unix_server(self.handleClient, path)
+        else:
+            server = await asyncio.start_server(self.handleClient, host, port)
+
+        async with server:
+            await server.serve_forever()
+
+    def run(self, host = "127.0.0.1", port = 8642, path = None):
+        asyncio.run(self.serve(host, port, path))
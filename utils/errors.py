@@ -0,0 +1,5 @@
+class UnsupportedInstructionError(Exception):
+    """
+        Raised when a game execute an instruction the emulator cannot run, the game is then stopped with a message
+        instead of crashing the emulator.
+    """
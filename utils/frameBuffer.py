@@ -0,0 +1,228 @@
+class FrameBuffer:
+    """
+        Frame buffer hold the state of the CHIP-8 screen, independently of any display surface.
+
+        Each row is stored as an integer of width bits, the most significant bit is the left most pixel.
+    """
+
+    # Pixels of each possible packed byte, 0 for off and 255 for on
+    pixelTable = [bytes(255 if (value >> (7 - i)) & 1 else 0 for i in range(8)) for value in range(256)]
+
+    def __init__(self, width = 64, height = 32):
+        self.width = width
+        self.height = height
+        self.mask = (1 << width) - 1
+
+        self.reset()
+
+    def reset(self):
+        self.rows = [0] * self.height
+        self.changed = True # Set when the content changed since the last presented frame
+        self.presentedRows = [0] * self.height # Rows as they were on the last presented frame
+
+    def clear(self):
+        self.rows = [0] * self.height
+        self.changed = True
+
+    def getPixel(self, x, y):
+        return (self.rows[y] >> (self.width - 1 - x)) & 1
+
+    def drawSprite(self, x, y, sprite, spriteWidth = 8):
+        """
+            XOR a 8 or 16 pixels wide sprite on the screen, x wrap around the screen and rows below the screen are clipped.
+            Return 1 when a lit pixel has been turned off (collision).
+
+            - sprite: bytes, one byte per row, or two bytes per row for 16 pixels wide sprites
+        """
+
+        width = self.width
+        mask = self.mask
+        rows = self.rows
+
+        if spriteWidth == 16:
+            sprite = self.wideRows(sprite)
+
+        x %= width
+        shift = width - spriteWidth
+        collision = 0
+
+        for spriteRow in sprite:
+            if y >= self.height:
+                break
+
+            if spriteRow:
+                line = spriteRow << shift
+                line = ((line >> x) | (line << (width - x))) & mask # Rotate right so the part out of the screen wrap around
+
+                if rows[y] & line: collision = 1
+                rows[y] ^= line
+
+            y += 1
+
+        self.changed = True
+
+        return collision
+
+    def drawSpriteClipped(self, x, y, sprite, spriteWidth = 8):
+        """
+            Like drawSprite, but only the position wrap around the screen, the sprite is cut at the screen edges.
+        """
+
+        width = self.width
+        height = self.height
+        rows = self.rows
+
+        if spriteWidth == 16:
+            sprite = self.wideRows(sprite)
+
+        x %= width
+        y %= height
+        shift = width - spriteWidth
+        collision = 0
+
+        for spriteRow in sprite:
+            if y >= height:
+                break
+
+            if spriteRow:
+                line = (spriteRow << shift) >> x # The part out of the screen is shifted out
+
+                if rows[y] & line: collision = 1
+                rows[y] ^= line
+
+            y += 1
+
+        self.changed = True
+
+        return collision
+
+    def drawSpriteWrapped(self, x, y, sprite, spriteWidth = 8):
+        """
+            Like drawSprite, but the rows below the screen wrap around to the top.
+        """
+
+        width = self.width
+        height = self.height
+        mask = self.mask
+        rows = self.rows
+
+        if spriteWidth == 16:
+            sprite = self.wideRows(sprite)
+
+        x %= width
+        shift = width - spriteWidth
+        collision = 0
+
+        for index, spriteRow in enumerate(sprite):
+            if spriteRow:
+                row = (y + index) % height
+                line = spriteRow << shift
+                line = ((line >> x) | (line << (width - x))) & mask
+
+                if rows[row] & line: collision = 1
+                rows[row] ^= line
+
+        self.changed = True
+
+        return collision
+
+    @staticmethod
+    def wideRows(sprite):
+        """
+            Return the rows of a 16 pixels wide sprite, two bytes per row.
+        """
+
+        return [(sprite[j] << 8) | sprite[j + 1] for j in range(0, len(sprite) - 1, 2)]
+
+    def scrollDown(self, n):
+        """
+            Move the screen n rows down, whole rows are moved so the cost does not depend on the width.
+        """
+
+        n = min(n, self.height)
+        self.rows = [0] * n + self.rows[:self.height - n]
+        self.changed = True
+
+    def scrollUp(self, n):
+        n = min(n, self.height)
+        self.rows = self.rows[n:] + [0] * n
+        self.changed = True
+
+    def scrollRight(self, n):
+        """
+            Move the screen n pixels right, each row is shifted as a single integer.
+        """
+
+        self.rows = [row >> n for row in self.rows]
+        self.changed = True
+
+    def scrollLeft(self, n):
+        mask = self.mask
+        self.rows = [(row << n) & mask for row in self.rows]
+        self.changed = True
+
+    def markPresented(self):
+        self.presentedRows = list(self.rows)
+        self.changed = False
+
+    def getDamage(self):
+        """
+            Return the rectangles (x, y, width, height) of the screen that changed since the last presented frame,
+            then mark the current frame as presented. Consecutive changed rows are merged into one rectangle.
+        """
+
+        rects = []
+        if not self.changed:
+            return rects
+
+        width = self.width
+        top = None
+        left = right = 0
+
+        for y in range(self.height):
+            diff = self.rows[y] ^ self.presentedRows[y]
+
+            if diff:
+                rowLeft = width - diff.bit_length() # Left most changed pixel
+                rowRight = width - (diff & -diff).bit_length() + 1 # Right most changed pixel, excluded
+
+                if top == None:
+                    top, left, right = y, rowLeft, rowRight
+                else:
+                    left, right = min(left, rowLeft), max(right, rowRight)
+
+            elif top != None:
+                rects.append((left, top, right - left, y - top))
+                top = None
+
+        if top != None:
+            rects.append((left, top, right - left, self.height - top))
+
+        self.markPresented()
+
+        return rects
+
+    def toBytes(self):
+        """
+            Return the screen packed as 1 bit per pixel, 8 pixels per byte, most significant bit first.
+        """
+
+        rowSize = self.width // 8
+        return b"".join(row.to_bytes(rowSize, "big") for row in self.rows)
+
+    def toPixels(self):
+        """
+            Return the screen as 1 byte per pixel, 0 for off and 255 for on, row by row.
+        """
+
+        pixelTable = self.pixelTable
+        return b"".join([pixelTable[value] for value in self.toBytes()])
+
+    def loadBytes(self, data):
+        """
+            Restore the screen from the packed format returned by toBytes.
+        """
+
+        rowSize = self.width // 8
+        self.rows = [int.from_bytes(data[y * rowSize:(y + 1) * rowSize], "big") for y in range(self.height)]
+        self.changed = True
@@ -0,0 +1,187 @@
+"""
+    Frame stream protocol, the frame buffer of a running machine sent to remote viewers.
+
+    A stream starts with the magic bytes "C8FS" and a version byte, then one message per frame whose frame buffer
+    changed. Each message is a header followed by its payload, integers are big endian:
+
+        kind     uint8     0 for a keyframe, 1 for a delta
+        frame    uint32    number of the frame
+        width    uint16    frame buffer size in pixels
+        height   uint16
+        length   uint32    size of the payload in bytes
+
+    The payload is the packed frame buffer (one bit per pixel, rows top to bottom, most significant bit on the left)
+    XORed with the previous frame buffer of the stream, or with zeros for a keyframe, then run length encoded.
+    A keyframe is sent first and whenever the size of the frame buffer changes.
+
+    Run length encoding: a token byte below 0x80 stand for token + 1 zero bytes, a token byte 0x80 | n is followed
+    by n + 1 literal bytes. Deltas are mostly zeros, a frame where one sprite moved takes a few dozen bytes
+    instead of 256.
+"""
+
+import struct
+
+magic = b"C8FS"
+version = 1
+
+headerFormat = struct.Struct(">BIHHI")
+
+keyframe = 0
+delta = 1
+
+def xor(a, b):
+    return (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).to_bytes(len(a), "big")
+
+def encodeRuns(data):
+    encoded = bytearray()
+    size = len(data)
+    index = 0
+
+    while index < size:
+        end = index
+
+        if data[index] == 0:
+            while end < size and data[end] == 0 and end - index < 128:
+                end += 1
+
+            encoded.append(end - index - 1)
+        else:
+            while end < size and data[end] != 0 and end - index < 128:
+                end += 1
+
+            encoded.append(0x80 | (end - index - 1))
+            encoded += data[index:end]
+
+        index = end
+
+    return bytes(encoded)
+
+def decodeRuns(data, size):
+    decoded = bytearray()
+    index = 0
+
+    while index < len(data):
+        token = data[index]
+        index += 1
+
+        if token & 0x80:
+            length = (token & 0x7f) + 1
+            decoded += data[index:index + length]
+            index += length
+        else:
+            decoded += bytes(token + 1)
+
+    if len(decoded) != size:
+        raise ValueError("Corrupted frame stream message")
+
+    return bytes(decoded)
+
+class FrameEncoder:
+    """
+        Frame encoder turn the successive states of a frame buffer into stream messages.
+    """
+
+    def __init__(self):
+        self.previous: bytes | None = None # Packed frame buffer of the last message
+        self.size = (0, 0)
+
+    def encode(self, frameBuffer, frame):
+        """
+            Return the message of the frame, None when the frame buffer did not change since the last message.
+        """
+
+        data = frameBuffer.toBytes()
+        size = (frameBuffer.width, frameBuffer.height)
+
+        if self.previous == None or size != self.size:
+            kind = keyframe
+            payload = encodeRuns(data)
+        elif data == self.previous:
+            return None
+        else:
+            kind = delta
+            payload = encodeRuns(xor(data, self.previous))
+
+        self.previous = data
+        self.size = size
+
+        return headerFormat.pack(kind, frame, size[0], size[1], len(payload)) + payload
+
+class FrameDecoder:
+    """
+        Frame decoder rebuild the frame buffer from the messages of a stream.
+    """
+
+    def __init__(self):
+        self.data: bytes | None = None # Packed frame buffer after the last message
+        self.width = 0
+        self.height = 0
+        self.frame = 0
+
+    def decode(self, header, payload):
+        """
+            Apply a message and return the packed frame buffer.
+        """
+
+        kind, self.frame, width, height, length = headerFormat.unpack(header)
+        data = decodeRuns(payload, width * height // 8)
+
+        if kind == delta:
+            if self.data == None or (width, height) != (self.width, self.height):
+                raise ValueError("Frame stream delta without its keyframe")
+
+            data = xor(data, self.data)
+
+        self.data = data
+        self.width = width
+        self.height = height
+
+        return data
+
+def writeStreamHeader(output):
+    output.write(magic + bytes([version]))
+
+def readStream(read):
+    """
+        Yield the width, height and packed frame buffer of each message,
+        read is a function returning the requested number of bytes, less only at the end of the stream.
+    """
+
+    if read(len(magic) + 1) != magic + bytes([version]):
+        raise ValueError("Not a version %d frame stream" % version)
+
+    decoder = FrameDecoder()
+
+    while True:
+        header = read(headerFormat.size)
+        if len(header) < headerFormat.size:
+            return
+
+        payload = read(headerFormat.unpack(header)[4])
+        data = decoder.decode(header, payload)
+
+        yield decoder.width, decoder.height, data
+
+def streamGame(emu, output, frames = None):
+    """
+        Run the loaded game headless in real time and write its frame stream to a binary file, e.g. stdout.
+    """
+
+    emu.dm.setHeadless(True)
+    emu.mem.fillMemory(emu.gameData)
+
+    encoder = FrameEncoder()
+    scheduler = emu.scheduler
+    scheduler.start()
+
+    writeStreamHeader(output)
+
+    while frames == None or scheduler.frames < frames:
+        executed, idle = emu.runFrame(scheduler.instructionsPerFrame)
+
+        message = encoder.encode(emu.dm.frameBuffer, scheduler.frames)
+        if message != None:
+            output.write(message)
+            output.flush()
+
+        scheduler.endFrame(executed, idle)
@@ -0,0 +1,93 @@
+"""
+    Reference viewer of the frame stream protocol described in utils/frameStream.py.
+
+    python main.py stream PONG | python -m utils.frameViewer    read a stream from stdin
+    python -m utils.frameViewer port id                          watch the instance id of an emulator server
+"""
+
+import sys, json, socket, threading
+
+import pygame
+
+from utils.displayManager import DisplayManager
+from utils.frameStream import readStream
+
+def connect(port, identifier, host = "127.0.0.1"):
+    """
+        Ask an emulator server to stream one of its instances, return the function reading the stream.
+    """
+
+    connection = socket.create_connection((host, port))
+    file = connection.makefile("rb")
+
+    connection.sendall(json.dumps({"command": "stream", "id": identifier}).encode() + b"\n")
+    response = json.loads(file.readline())
+
+    if not response["ok"]:
+        raise ValueError(response["error"])
+
+    return file.read
+
+class Viewer:
+    """
+        Viewer show a frame stream in a window. The stream is read by a background thread,
+        the window only present the newest frame so a slow window never delays the stream.
+    """
+
+    def __init__(self, read):
+        self.read = read
+        self.frame = None # Newest (width, height, data) received, None once presented
+        self.ended = False
+
+        self.dm = DisplayManager()
+        self.dm.invertColors() # Same colors as a game played in a window
+        self.dm.openDisplay()
+
+        pygame.display.set_caption("Emu-CHIP8 viewer")
+
+        self.frameEvent = pygame.event.custom_type()
+
+    def receive(self):
+        try:
+            for frame in readStream(self.read):
+                self.frame = frame
+                pygame.event.post(pygame.event.Event(self.frameEvent))
+        except (OSError, ValueError):
+            pass # Connection lost or corrupted stream, keep showing the last frame
+
+        self.ended = True
+
+    def present(self):
+        frame, self.frame = self.frame, None
+
+        if frame == None:
+            return
+
+        width, height, data = frame
+        dm = self.dm
+
+        if (width, height) != dm.getResolution():
+            dm.setResolution(width, height)
+
+        dm.frameBuffer.loadBytes(data)
+        dm.update()
+
+    def loop(self):
+        threading.Thread(target = self.receive, daemon = True).start()
+
+        while True:
+            event = pygame.event.wait()
+
+            if event.type == pygame.QUIT:
+                self.dm.closeDisplay()
+                pygame.quit()
+                return
+
+            if event.type == self.frameEvent:
+                self.present()
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        Viewer(connect(int(sys.argv[1]), int(sys.argv[2]))).loop()
+    else:
+        Viewer(sys.stdin.buffer.read).loop()
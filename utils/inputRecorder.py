@@ -0,0 +1,88 @@
+import struct, hashlib
+
+from array import array
+
+class InputRecording:
+    """
+        Input recording hold the keypad state of every frame of a run, with what is needed to replay it
+        exactly: the random seed, the number of instructions per frame and a hash of the ROM.
+
+        The keypad state is a 16 bits mask, bit n is set when key n is pressed.
+
+        File layout, all numbers are big endian:
+        - header: "C8IN" then the format version (1 byte)
+        - seed (8 bytes), instructions per frame (2 bytes), ROM sha1 (20 bytes), number of runs (4 bytes)
+        - runs: number of frames (2 bytes) and keypad state (2 bytes), consecutive identical frames share a run
+    """
+
+    magic = b"C8IN"
+    version = 1
+
+    headerFormat = struct.Struct(">QH20sI")
+    runFormat = struct.Struct(">HH")
+
+    def __init__(self, seed = 0, instructionsPerFrame = 9, romHash = bytes(20)):
+        self.seed = seed
+        self.instructionsPerFrame = instructionsPerFrame
+        self.romHash = romHash
+
+        self.frames = array("H") # Keypad state of each frame
+
+    @staticmethod
+    def hashRom(rom):
+        return hashlib.sha1(rom).digest()
+
+    def record(self, keys):
+        self.frames.append(keys)
+
+    def getKeys(self, frame):
+        """
+            Return the keypad state of the frame, no key is pressed after the end of the recording.
+        """
+
+        if frame < len(self.frames):
+            return self.frames[frame]
+
+        return 0
+
+    def toBytes(self):
+        runs = []
+
+        for keys in self.frames:
+            if runs and runs[-1][1] == keys and runs[-1][0] < 0xFFFF:
+                runs[-1][0] += 1
+            else:
+                runs.append([1, keys])
+
+        return b"".join(
+            [self.magic, bytes([self.version]), self.headerFormat.pack(self.seed, self.instructionsPerFrame, self.romHash, len(runs))] +
+            [self.runFormat.pack(length, keys) for length, keys in runs]
+        )
+
+    @staticmethod
+    def fromBytes(data):
+        if data[:4] != InputRecording.magic:
+            raise ValueError("Not an input recording")
+
+        if data[4] != InputRecording.version:
+            raise ValueError("Unsupported input recording version " + str(data[4]))
+
+        seed, instructionsPerFrame, romHash, runCount = InputRecording.headerFormat.unpack_from(data, 5)
+        recording = InputRecording(seed, instructionsPerFrame, romHash)
+
+        offset = 5 + InputRecording.headerFormat.size
+        for _ in range(runCount):
+            length, keys = InputRecording.runFormat.unpack_from(data, offset)
+            recording.frames.extend([keys] * length)
+            offset += InputRecording.runFormat.size
+
+        return recording
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.toBytes())
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as file:
+            return InputRecording.fromBytes(file.read())
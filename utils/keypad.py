@@ -0,0 +1,102 @@
+import json
+
+import pygame
+
+# Keys of the CHIP-8 keypad, row by row as on the COSMAC VIP
+keypadOrder = (0x1, 0x2, 0x3, 0xC, 0x4, 0x5, 0x6, 0xD, 0x7, 0x8, 0x9, 0xE, 0xA, 0x0, 0xB, 0xF)
+
+# Keyboard key of each keypad key, the left 4x4 block of the keyboard
+keymaps = {
+    "azerty": dict(zip(keypadOrder, "1234azerqsdfwxcv")),
+    "qwerty": dict(zip(keypadOrder, "1234qwerasdfzxcv")),
+    "qwertz": dict(zip(keypadOrder, "1234qwerasdfyxcv")),
+}
+
+class Keypad:
+    """
+        Keypad keep the state of the 16 CHIP-8 keys, updated from the keyboard events through a keymap.
+
+        The emulator read it once per frame as a 16 bits mask, bit n set when key n is pressed. A key pressed and
+        released between two reads is still reported pressed on the next read, so short taps are never lost and
+        the input latency is at most one frame.
+    """
+
+    def __init__(self, keymap = "azerty"):
+        self.setKeymap(keymap)
+        self.reset()
+
+    def reset(self):
+        self.held = 0 # Keys currently held down
+        self.pressed = 0 # Keys pressed since the last read
+
+    def setKeymap(self, keymap):
+        """
+            Use a keymap: the name of a built-in keymap, the path of a JSON file or a dict,
+            mapping each keypad key ("0" to "F") to a pygame key name ("a", "space", "up"...).
+        """
+
+        if isinstance(keymap, str):
+            keymap = keymaps[keymap] if keymap in keymaps else self.loadKeymap(keymap)
+
+        self.keymap = {} # Keypad key of each pygame key code
+
+        for key, name in keymap.items():
+            key = int(key, 16) if isinstance(key, str) else key
+
+            if key not in keypadOrder:
+                raise ValueError("Invalid keypad key: %s" % key)
+
+            code = getattr(pygame, "K_" + name, None) or getattr(pygame, "K_" + name.upper(), None)
+
+            if code == None:
+                raise ValueError("Unknown key name: %s" % name)
+
+            self.keymap[code] = key
+
+        self.reset()
+
+    @staticmethod
+    def loadKeymap(path):
+        with open(path) as file:
+            return json.load(file)
+
+    def press(self, key):
+        self.held |= 1 << key
+        self.pressed |= 1 << key
+
+    def release(self, key):
+        self.held &= ~(1 << key)
+
+    def setKeys(self, keys):
+        """
+            Hold exactly the keys of a keypad mask, the newly held ones count as pressed.
+        """
+
+        self.pressed |= keys & ~self.held
+        self.held = keys
+
+    def handleEvent(self, event):
+        if event.type == pygame.KEYDOWN:
+            key = self.keymap.get(event.key)
+
+            if key != None:
+                self.press(key)
+
+        elif event.type == pygame.KEYUP:
+            key = self.keymap.get(event.key)
+
+            if key != None:
+                self.release(key)
+
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            self.held = 0 # Key releases are not received while the window is not focused
+
+    def readKeys(self):
+        """
+            Return the keypad mask for the coming frame.
+        """
+
+        keys = self.held | self.pressed
+        self.pressed = 0
+
+        return keys
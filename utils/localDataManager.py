@@ -1,25 +1,28 @@
 import os
 
-def getGames():
+from utils.romLibrary import RomLibrary
+
+gamesDirectory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+library: RomLibrary | None = None
+
+def getLibrary():
     """
-        Return the name of all files in the 'games' folder.
+        Return the library of the 'games' folder, indexed on first use.
     """
 
-    os.chdir("games") # Change path
-    dirFileNamesList = os.listdir() # Read all files names in current path
-    os.chdir("../") # Change path
+    global library
 
-    return dirFileNamesList
+    if library == None: library = RomLibrary(gamesDirectory)
+    return library
 
-def getGameFile(fileName):
+def loadGame(emu, name, quirks = None):
     """
-        Read game file content.
-        
-        - fileName: string, name of the file
+        Load a game of the library into an emulator, with its platform and its quirk profile:
+        the one given, else the one saved in the index, else the default one of the platform.
     """
 
-    file = open("./games/" + fileName, "rb")
-    fileContent = file.read()
-    file.close()
+    library = getLibrary()
+    entry = library.getEntry(name)
 
-    return fileContent
\ No newline at end of file
+    emu.setRom(library.getRom(name), entry["platform"], quirks or entry.get("quirks"))
@@ -0,0 +1,165 @@
+import json, time
+
+from collections import Counter
+
+import pygame
+
+def opcodeFamily(instruction):
+    """
+        Return the name of the opcode family of an instruction, e.g. "8XY4" or "DXYN".
+    """
+
+    code = instruction >> 12
+    nn = instruction & 0xff
+
+    if instruction == 0x00E0: return "00E0"
+    if instruction == 0x00EE: return "00EE"
+    if instruction & 0xffe0 == 0x00C0: return "00%XN" % (nn >> 4) # 00CN and 00DN scrolls
+    if 0x00FB <= instruction <= 0x00FF: return "%04X" % instruction
+    if code == 0x5 and instruction & 0xf in (0x2, 0x3): return "5XY%X" % (instruction & 0xf)
+    if code == 0xD and instruction & 0xf == 0: return "DXY0"
+    if instruction == 0xF000: return "F000"
+    if code == 0x8: return "8XY%X" % (instruction & 0xf)
+    if code == 0xE: return "EX%02X" % nn
+    if code == 0xF: return "FX%02X" % nn
+
+    return ["0NNN", "1NNN", "2NNN", "3XNN", "4XNN", "5XY0", "6XNN", "7XNN", "", "9XY0", "ANNN", "BNNN", "CXNN", "DXYN"][code]
+
+class Profiler:
+    """
+        Profiler collect where the emulation time goes: count and cumulative time of each opcode family,
+        most executed addresses, draw calls per frame and frames where the host missed its deadline.
+
+        While enabled the emulator run instructions through Profiler.step, an instrumented copy of the
+        interpreter loop. When disabled nothing of it is on the hot path.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = Counter() # Number of executions of each opcode family
+        self.times = Counter() # Cumulative time, in nanoseconds, spent in each opcode family
+        self.addresses = Counter() # Number of executions of each address
+
+        self.families = {} # Opcode family of each instruction already seen
+
+        self.frames = 0
+        self.drawCalls = 0 # Draw calls of the current frame
+        self.lastDrawCalls = 0 # Draw calls of the last finished frame
+        self.maxDrawCalls = 0
+        self.totalDrawCalls = 0
+
+        self.missedFrames = [] # Numbers of the frames that ended after their deadline
+
+        self.font = None
+
+    def step(self, emu, count):
+        """
+            Execute count instructions like Emu.step, measuring each of them.
+        """
+
+        mem = emu.mem
+        codeCache = mem.codeCache
+        memory = mem.mem
+        decode = emu.cpu.decode
+
+        families = self.families
+        counts = self.counts
+        times = self.times
+        addresses = self.addresses
+        clock = time.perf_counter_ns
+
+        for _ in range(count):
+            pc = mem.pc
+            instruction = (memory[pc] << 8) + memory[pc + 1]
+
+            handler = codeCache[pc]
+            if handler is None:
+                handler = codeCache[pc] = decode(instruction)
+
+            start = clock()
+            handler()
+            elapsed = clock() - start
+
+            family = families.get(instruction)
+            if family == None:
+                family = families[instruction] = opcodeFamily(instruction)
+
+            counts[family] += 1
+            times[family] += elapsed
+            addresses[pc] += 1
+
+            if family == "DXYN" or family == "DXY0":
+                self.drawCalls += 1
+
+            if mem.incrementPC:
+                mem.pc += 2
+            else:
+                mem.incrementPC = True
+
+    def endFrame(self, late):
+        """
+            Account for a finished frame.
+
+            - late: bool, the frame ended after its deadline
+        """
+
+        if late:
+            self.missedFrames.append(self.frames)
+
+        self.frames += 1
+
+        self.lastDrawCalls = self.drawCalls
+        self.maxDrawCalls = max(self.maxDrawCalls, self.drawCalls)
+        self.totalDrawCalls += self.drawCalls
+        self.drawCalls = 0
+
+    def getReport(self):
+        totalTime = sum(self.times.values())
+
+        return {
+            "instructions": sum(self.counts.values()),
+            "frames": self.frames,
+            "opcodes": {
+                family: {
+                    "count": count,
+                    "time": self.times[family] / 1e9,
+                    "share": self.times[family] / totalTime if totalTime else 0,
+                }
+                for family, count in self.counts.most_common()
+            },
+            "hotAddresses": [[hex(address), count] for address, count in self.addresses.most_common(20)],
+            "drawCallsPerFrame": {
+                "average": self.totalDrawCalls / self.frames if self.frames else 0,
+                "max": self.maxDrawCalls,
+            },
+            "missedFrames": len(self.missedFrames),
+            "missedFrameNumbers": self.missedFrames[:100],
+        }
+
+    def saveReport(self, path):
+        with open(path, "w") as file:
+            json.dump(self.getReport(), file, indent = 4)
+
+    def getOverlayLines(self, scheduler):
+        totalTime = sum(self.times.values()) or 1
+
+        lines = ["%.0f instr/s  %.1f fps" % (scheduler.getStats()["ips"], scheduler.getStats()["fps"])]
+        lines.append("draws/frame %d  missed frames %d" % (self.lastDrawCalls, len(self.missedFrames)))
+
+        for family, elapsed in self.times.most_common(5):
+            lines.append("%s %5.1f%%  %d" % (family, 100 * elapsed / totalTime, self.counts[family]))
+
+        return lines
+
+    def drawOverlay(self, surface, scheduler):
+        """
+            Draw the live statistics in the top left corner of the surface.
+        """
+
+        if self.font == None:
+            self.font = pygame.font.SysFont("monospace", 16, bold = True)
+
+        for index, line in enumerate(self.getOverlayLines(scheduler)):
+            surface.blit(self.font.render(line, True, (255, 0, 0), (0, 0, 0)), (4, 4 + index * 18))
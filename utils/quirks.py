@@ -0,0 +1,69 @@
+"""
+    Quirk profiles, the behaviours that differ from one CHIP-8 interpreter to another.
+
+    - shiftVy: 8XY6 and 8XYE shift vy into vx, instead of shifting vx in place
+    - indexIncrement: FX55 and FX65 add x + indexIncrement to i, None to leave i unchanged
+    - jumpVx: BNNN jump to XNN + vx, instead of NNN + v0
+    - vfReset: 8XY1, 8XY2 and 8XY3 reset vf
+    - indexOverflow: FX1E set vf when i goes past the end of the memory
+    - sprites: "clip" cut sprites at the screen edges, "wrapX" wrap them horizontally and cut them at the bottom,
+      "wrap" wrap them on both axes
+
+    Games are run with the profile saved for them in the library index, else with the profile of their platform.
+"""
+
+profiles = {
+    "vip": { # COSMAC VIP, the original interpreter
+        "shiftVy": True,
+        "indexIncrement": 1,
+        "jumpVx": False,
+        "vfReset": True,
+        "indexOverflow": False,
+        "sprites": "clip",
+    },
+    "chip48": { # CHIP-48 on the HP-48
+        "shiftVy": False,
+        "indexIncrement": 0,
+        "jumpVx": True,
+        "vfReset": False,
+        "indexOverflow": False,
+        "sprites": "clip",
+    },
+    "schip": { # SUPER-CHIP 1.1
+        "shiftVy": False,
+        "indexIncrement": None,
+        "jumpVx": True,
+        "vfReset": False,
+        "indexOverflow": False,
+        "sprites": "clip",
+    },
+    "modern": { # Behaviour most CHIP-8 games written for later interpreters expect
+        "shiftVy": False,
+        "indexIncrement": None,
+        "jumpVx": False,
+        "vfReset": False,
+        "indexOverflow": True,
+        "sprites": "wrapX",
+    },
+    "xochip": { # XO-CHIP, as implemented by Octo
+        "shiftVy": True,
+        "indexIncrement": 1,
+        "jumpVx": False,
+        "vfReset": False,
+        "indexOverflow": False,
+        "sprites": "wrap",
+    },
+}
+
+# Profile used for the games of each platform, unless another one is chosen
+platformProfiles = {
+    "chip8": "modern",
+    "schip": "schip",
+    "xochip": "xochip",
+}
+
+def getProfile(name):
+    if name not in profiles:
+        raise ValueError("Unknown quirk profile: %s, expected one of %s" % (name, ", ".join(profiles)))
+
+    return profiles[name]
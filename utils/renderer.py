@@ -0,0 +1,130 @@
+import threading, time
+
+from utils.frameBuffer import FrameBuffer
+
+class Renderer:
+    """
+        Renderer present the frames of a display manager from its own thread, so a slow display (e.g. a remote
+        X session) never slows down the emulation.
+
+        The emulation thread publishes each finished frame by replacing a single reference to an immutable
+        snapshot, without any lock: (sequence, redraws, width, height, rows, second plane rows or None).
+        The render thread wakes up refreshRate times per second and presents the latest snapshot through a display
+        manager of its own, the frames published in between are dropped. pygame releases the GIL while scaling and
+        flipping, so both threads really run at the same time.
+    """
+
+    def __init__(self, dm, refreshRate = 60):
+        self.dm = dm # Display manager of the emulation, its frame buffer and settings are read from it
+        self.refreshRate = refreshRate
+
+        self.view = type(dm)() # Display manager presenting the snapshots, only used by the render thread
+        self.view.display = dm.display
+
+        self.latest: tuple | None = None # Last published snapshot
+        self.sequence = 0 # Number of frames published
+        self.redraws = 0 # Number of published frames that required a full redraw
+
+        self.presented = 0 # Number of frames presented
+        self.dropped = 0 # Number of frames replaced by a newer one before they could be presented
+
+        self.running = False
+        self.thread: threading.Thread | None = None
+
+    def start(self):
+        self.running = True
+
+        self.thread = threading.Thread(target = self.run, name = "renderer", daemon = True)
+        self.thread.start()
+
+    def stop(self):
+        """
+            Stop the render thread after the frame it is presenting, if any.
+        """
+
+        self.running = False
+
+        if self.thread != None:
+            self.thread.join()
+            self.thread = None
+
+    def publish(self):
+        """
+            Publish the current frame, called by the emulation thread once per frame.
+        """
+
+        dm = self.dm
+        frameBuffer = dm.frameBuffer
+        secondPlane = dm.secondPlane
+
+        if dm.shouldUpdate:
+            self.redraws += 1
+            dm.shouldUpdate = False
+
+        self.sequence += 1
+        self.latest = (
+            self.sequence, self.redraws, frameBuffer.width, frameBuffer.height, tuple(frameBuffer.rows),
+            tuple(secondPlane.rows) if secondPlane != None else None,
+        )
+
+    def run(self):
+        period = 1 / self.refreshRate
+        nextTime = time.perf_counter()
+        shown = 0 # Sequence of the last presented frame
+        redraws = 0
+
+        while self.running:
+            nextTime += period
+            delay = nextTime - time.perf_counter()
+
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                nextTime = time.perf_counter() # The display is slower than the refresh rate, do not catch up
+
+            frame = self.latest
+
+            if frame != None and frame[0] != shown:
+                self.dropped += frame[0] - shown - 1
+                self.presented += 1
+
+                self.present(frame, frame[1] != redraws)
+                shown, redraws = frame[0], frame[1]
+
+            elif self.view.fading:
+                self.view.update()
+
+    def present(self, frame, redraw):
+        _, _, width, height, rows, secondRows = frame
+        dm = self.dm
+        view = self.view
+
+        if (width, height) != view.getResolution():
+            view.setResolution(width, height)
+
+        # Settings may be changed by the emulation thread at any time, they are taken as they are
+        view.palette, view.planePalette = dm.palette, dm.planePalette
+        view.scaling = dm.scaling
+        view.phosphorDecay, view.decayTable = dm.phosphorDecay, dm.decayTable
+        view.overlay = dm.overlay
+
+        view.frameBuffer.rows = rows
+        view.frameBuffer.changed = True
+
+        if secondRows != None:
+            if view.secondPlane == None:
+                view.secondPlane = FrameBuffer(width, height)
+                redraw = True
+
+            view.secondPlane.rows = secondRows
+            view.secondPlane.changed = True
+
+        elif view.secondPlane != None:
+            view.secondPlane = None
+            redraw = True
+
+        view.shouldUpdate = view.shouldUpdate or redraw
+        view.update()
+
+    def getStats(self):
+        return {"published": self.sequence, "presented": self.presented, "dropped": self.dropped}
@@ -0,0 +1,110 @@
+import zlib
+
+from collections import deque
+
+from utils.saveState import saveState, loadState
+
+class RewindBuffer:
+    """
+        Rewind buffer keep the last frames of machine state in a bounded ring.
+
+        Every keyframeInterval frames a full save state is stored, the frames in between only store the XOR of
+        their save state with the previous keyframe. Most bytes do not change from one frame to another so the
+        deltas are mostly zeros, which compress to a few bytes.
+
+        The buffer never hold more than maxFrames entries nor more than maxBytes of compressed data,
+        the oldest entries are dropped first.
+    """
+
+    def __init__(self, maxFrames = 600, maxBytes = 4 * 1024 * 1024, keyframeInterval = 60):
+        self.maxFrames = maxFrames # 10 seconds at 60 frames per second
+        self.maxBytes = maxBytes
+        self.keyframeInterval = keyframeInterval
+
+        self.reset()
+
+    def reset(self):
+        self.entries = deque() # (isKeyframe, compressed data) from oldest to newest
+        self.size = 0 # Total size of the compressed data
+
+        self.keyframe = None # Uncompressed state of the newest keyframe
+        self.sinceKeyframe = 0 # Number of deltas pushed since the newest keyframe
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, emu):
+        """
+            Store the current state of the machine, should be called once per frame.
+        """
+
+        state = saveState(emu)
+
+        if self.keyframe == None or self.sinceKeyframe >= self.keyframeInterval or len(state) != len(self.keyframe):
+            self.keyframe = state
+            self.sinceKeyframe = 0
+            self.append(True, zlib.compress(state, 1))
+        else:
+            self.sinceKeyframe += 1
+            self.append(False, zlib.compress(self.xor(state, self.keyframe), 1))
+
+    def append(self, isKeyframe, data):
+        self.entries.append((isKeyframe, data))
+        self.size += len(data)
+
+        while len(self.entries) > self.maxFrames or (self.size > self.maxBytes and len(self.entries) > 1):
+            self.dropOldest()
+
+    def dropOldest(self):
+        """
+            Drop the oldest entry, deltas left without their keyframe are dropped with it.
+        """
+
+        isKeyframe, data = self.entries.popleft()
+        self.size -= len(data)
+
+        while self.entries and not self.entries[0][0]:
+            isKeyframe, data = self.entries.popleft()
+            self.size -= len(data)
+
+        if not self.entries:
+            self.reset()
+
+    def stepBack(self, emu):
+        """
+            Restore the newest stored state and remove it from the buffer.
+            Return False when there is nothing left to rewind.
+        """
+
+        if not self.entries:
+            return False
+
+        isKeyframe, data = self.entries.pop()
+        self.size -= len(data)
+
+        if isKeyframe:
+            state = zlib.decompress(data)
+            self.keyframe = self.findKeyframe()
+            self.sinceKeyframe = self.keyframeInterval # Next push start a new keyframe
+        else:
+            state = self.xor(zlib.decompress(data), self.keyframe)
+            self.sinceKeyframe -= 1
+
+        loadState(emu, state)
+
+        return True
+
+    def findKeyframe(self):
+        """
+            Return the uncompressed state of the newest keyframe left in the buffer.
+        """
+
+        for isKeyframe, data in reversed(self.entries):
+            if isKeyframe:
+                return zlib.decompress(data)
+
+        return None
+
+    @staticmethod
+    def xor(a, b):
+        return (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).to_bytes(len(a), "big")
@@ -0,0 +1,177 @@
+import os, json, hashlib
+
+def detectPlatform(rom):
+    """
+        Guess the platform a ROM was written for: "chip8", "schip" or "xochip".
+
+        Instructions are followed from the entry point through jumps, calls and skips, so sprite data is
+        never mistaken for an extended instruction.
+    """
+
+    if len(rom) > 0x1000 - 0x200:
+        return "xochip" # Does not fit in 4 KB of memory
+
+    platform = "chip8"
+    pending = [0x200]
+    seen = set()
+
+    while pending:
+        address = pending.pop()
+        offset = address - 0x200
+
+        if address in seen or offset < 0 or offset + 1 >= len(rom):
+            continue
+
+        seen.add(address)
+        instruction = (rom[offset] << 8) + rom[offset + 1]
+        code = instruction >> 12
+
+        if instruction == 0xF000 or (code == 0x5 and instruction & 0xf in (0x2, 0x3)) or (code == 0xF and instruction & 0xff in (0x01, 0x02, 0x3A)):
+            return "xochip"
+
+        if instruction in (0x00FB, 0x00FC, 0x00FD, 0x00FE, 0x00FF) or instruction & 0xfff0 == 0x00C0 or (code == 0xF and instruction & 0xff in (0x30, 0x75, 0x85)):
+            platform = "schip"
+
+        if code == 0x1:
+            pending.append(instruction & 0xfff)
+        elif code == 0x2:
+            pending.append(instruction & 0xfff)
+            pending.append(address + 2)
+        elif instruction == 0x00EE or code == 0xB or instruction == 0x00FD:
+            pass # End of the path, BNNN jump target is only known at run time
+        elif code in (0x3, 0x4, 0x5, 0x9, 0xE):
+            pending.append(address + 2)
+            pending.append(address + 4)
+        else:
+            pending.append(address + 2)
+
+    return platform
+
+class RomLibrary:
+    """
+        Rom library index the ROM files of a directory: name, size, content hash and detected platform,
+        plus the quirk profile chosen for the game, if any.
+
+        The index is saved next to the ROMs and reused as long as the size and modification time of each file
+        are unchanged, so opening a large library only costs a directory scan. ROM contents are cached once read.
+        Nothing depends on the current working directory.
+    """
+
+    indexName = ".index.json"
+    indexVersion = 1
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.indexPath = os.path.join(directory, self.indexName)
+
+        self.entries = {} # Index entry of each ROM, by name
+        self.roms = {} # Content of the ROMs already read, by name
+
+        self.refresh()
+
+    def loadIndex(self):
+        try:
+            with open(self.indexPath) as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        if index.get("version") != self.indexVersion:
+            return {}
+
+        return index["entries"]
+
+    def saveIndex(self):
+        """
+            Write the index atomically, other processes never read a partial file.
+        """
+
+        temporaryPath = self.indexPath + ".%d.tmp" % os.getpid()
+
+        try:
+            with open(temporaryPath, "w") as file:
+                json.dump({"version": self.indexVersion, "entries": self.entries}, file, indent = 4)
+
+            os.replace(temporaryPath, self.indexPath)
+        except OSError:
+            pass # Read only library, the index will be rebuilt next time
+
+    def refresh(self):
+        """
+            Scan the directory, only new or modified files are read and hashed.
+        """
+
+        previous = self.loadIndex()
+        entries = {}
+
+        with os.scandir(self.directory) as files:
+            for file in files:
+                if file.name.startswith(".") or not file.is_file():
+                    continue
+
+                stat = file.stat()
+                entry = previous.get(file.name)
+
+                if entry == None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime_ns:
+                    rom = self.readFile(file.name)
+
+                    quirks = entry.get("quirks") if entry != None else None
+
+                    entry = {
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime_ns,
+                        "sha1": hashlib.sha1(rom).hexdigest(),
+                        "platform": detectPlatform(rom),
+                    }
+
+                    if quirks != None: # Chosen by the user, kept when the file changes
+                        entry["quirks"] = quirks
+
+                    self.roms[file.name] = rom
+
+                entries[file.name] = entry
+
+        changed = entries != previous
+        self.entries = dict(sorted(entries.items()))
+
+        if changed:
+            self.saveIndex()
+
+    def readFile(self, name):
+        with open(os.path.join(self.directory, name), "rb") as file:
+            return file.read()
+
+    def getNames(self):
+        return list(self.entries)
+
+    def has(self, name):
+        return name in self.entries
+
+    def getEntry(self, name):
+        return self.entries[name]
+
+    def setQuirks(self, name, quirks):
+        """
+            Save the quirk profile of a game in the index, None to use the default one of its platform.
+        """
+
+        entry = self.entries[name]
+
+        if quirks == None:
+            entry.pop("quirks", None)
+        else:
+            entry["quirks"] = quirks
+
+        self.saveIndex()
+
+    def getRom(self, name):
+        """
+            Return the content of a ROM, read from the disk only the first time.
+        """
+
+        rom = self.roms.get(name)
+
+        if rom == None:
+            rom = self.roms[name] = self.readFile(name)
+
+        return rom
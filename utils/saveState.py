@@ -0,0 +1,158 @@
+"""
+    Save states hold the full state of an emulated machine in a compact binary format.
+
+    Layout, all numbers are big endian:
+    - header: "C8ST" then the format version (1 byte)
+    - memory: size (4 bytes) then the memory content
+    - registers: v0 to vF (16 bytes), i, pc (2 bytes each), sp (1 byte), stack (16 x 2 bytes),
+      delay timer, sound timer, incrementPC (1 byte each)
+    - frame buffer: width, height (2 bytes each) then the screen packed as 1 bit per pixel
+    - random generator: version (1 byte), 625 internal words (4 bytes each), gauss flag (1 byte) and value (8 bytes)
+    - extensions: plane mask (1 byte), second plane flag (1 byte) followed by the packed second plane when set,
+      persistent flags (16 bytes), audio pattern (16 bytes), pitch (1 byte)
+
+    Version 1 states, with a 2 bytes memory size and without extensions, can still be loaded.
+"""
+
+import struct
+
+magic = b"C8ST"
+version = 2
+
+registersFormat = struct.Struct(">16sHHB16HBBB")
+frameBufferFormat = struct.Struct(">HH")
+randomFormat = struct.Struct(">B625I?d")
+extensionsFormat = struct.Struct(">B?")
+
+memorySizes = (4096, 65536) # CHIP-8 and SUPER-CHIP, XO-CHIP
+resolutions = ((64, 32), (128, 64)) # Low and high resolution
+
+def saveState(emu) -> bytes:
+    """
+        Return the state of the machine as bytes.
+    """
+
+    mem = emu.mem
+    dm = emu.dm
+    frameBuffer = dm.frameBuffer
+
+    randomVersion, randomWords, gauss = emu.cpu.random.getstate()
+
+    return b"".join([
+        magic, bytes([version]),
+        struct.pack(">I", len(mem.mem)), mem.mem,
+        registersFormat.pack(bytes(mem.registers), mem.i, mem.pc, mem.sp, *mem.stack, mem.dt, mem.st, mem.incrementPC),
+        frameBufferFormat.pack(frameBuffer.width, frameBuffer.height), frameBuffer.toBytes(),
+        randomFormat.pack(randomVersion, *randomWords, gauss != None, gauss or 0.0),
+        extensionsFormat.pack(dm.planeMask, dm.secondPlane != None), dm.secondPlane.toBytes() if dm.secondPlane != None else b"",
+        bytes(mem.rplFlags), mem.audioPattern, bytes([mem.pitch]),
+    ])
+
+def loadState(emu, data: bytes) -> None:
+    """
+        Restore the state of the machine from bytes returned by saveState.
+        The whole state is checked before anything is restored, an invalid one raise ValueError and leave the
+        machine unchanged.
+    """
+
+    if data[:4] != magic or len(data) < 5:
+        raise ValueError("Not a save state")
+
+    stateVersion = data[4]
+
+    if stateVersion not in (1, version):
+        raise ValueError("Unsupported save state version " + str(stateVersion))
+
+    try:
+        offset = 5
+
+        sizeFormat = ">H" if stateVersion == 1 else ">I"
+        size = struct.unpack_from(sizeFormat, data, offset)[0]
+        offset += struct.calcsize(sizeFormat)
+
+        if size not in memorySizes:
+            raise ValueError("Invalid memory size " + str(size))
+
+        memory = data[offset:offset + size]
+        offset += size
+
+        registers = registersFormat.unpack_from(data, offset)
+        offset += registersFormat.size
+
+        width, height = frameBufferFormat.unpack_from(data, offset)
+        offset += frameBufferFormat.size
+
+        if (width, height) not in resolutions:
+            raise ValueError("Invalid resolution %dx%d" % (width, height))
+
+        planeSize = width * height // 8
+        firstPlane = data[offset:offset + planeSize]
+        offset += planeSize
+
+        random = randomFormat.unpack_from(data, offset)
+        offset += randomFormat.size
+
+        if stateVersion == 1:
+            planeMask, hasSecondPlane = 1, False
+        else:
+            planeMask, hasSecondPlane = extensionsFormat.unpack_from(data, offset)
+            offset += extensionsFormat.size
+
+        secondPlane = data[offset:offset + planeSize] if hasSecondPlane else None
+        offset += planeSize if hasSecondPlane else 0
+
+        extensions = data[offset:offset + 33] if stateVersion != 1 else None
+        offset += 33 if stateVersion != 1 else 0
+    except struct.error:
+        raise ValueError("Truncated save state")
+
+    if len(data) != offset:
+        raise ValueError("Save state of %d bytes, expected %d" % (len(data), offset))
+
+    if registers[3] > 16 or registers[2] >= size or planeMask > 3:
+        raise ValueError("Invalid registers in save state")
+
+    emu.cpu.random.setstate((random[0], random[1:626], random[627] if random[626] else None)) # Raise before any change if invalid
+
+    mem = emu.mem
+    dm = emu.dm
+
+    if size != len(mem.mem):
+        mem.resize(size)
+
+    mem.mem[:] = memory
+    mem.invalidateCode(0, size)
+
+    mem.registers[:] = registers[0] # Updated in place, the CPU keep a reference on the list
+    mem.i, mem.pc, mem.sp = registers[1:4]
+    mem.stack[:] = registers[4:20]
+    mem.dt, mem.st = registers[20:22]
+    mem.incrementPC = bool(registers[22])
+
+    if dm.getResolution() != (width, height):
+        dm.setResolution(width, height)
+
+    dm.frameBuffer.loadBytes(firstPlane)
+
+    if secondPlane != None:
+        dm.setPlanes(planeMask | 2) # Create the second plane
+        dm.secondPlane.loadBytes(secondPlane)
+    elif dm.secondPlane != None:
+        dm.secondPlane = None
+        dm.shouldUpdate = True
+
+    dm.setPlanes(planeMask)
+
+    if extensions != None:
+        mem.rplFlags[:] = extensions[:16]
+        mem.audioPattern[:] = extensions[16:32]
+        mem.pitch = extensions[32]
+    emu.cpu.waitingKey = False # Set again by FX0A if the restored state is waiting for a key
+
+def writeStateFile(emu, path) -> None:
+    with open(path, "wb") as file:
+        file.write(saveState(emu))
+
+def readStateFile(emu, path) -> None:
+    with open(path, "rb") as file:
+        loadState(emu, file.read())
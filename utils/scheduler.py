@@ -0,0 +1,101 @@
+import time
+
+class Scheduler:
+    """
+        Scheduler split the emulation into frames and keep them aligned on the wall clock.
+
+        Instructions are executed in batches of instructionsPerFrame, then the timers and the screen
+        are updated once per frame. In unlimited mode frames are chained without waiting.
+    """
+
+    def __init__(self, frameRate = 60, instructionsPerFrame = 9, unlimited = False):
+        self.frameRate = frameRate
+        self.instructionsPerFrame = instructionsPerFrame # 60 * 9 = 540 instructions per second
+        self.unlimited = unlimited
+
+        self.maxLateFrames = 5 # When the host is this much late, stop trying to catch up
+
+        self.reset()
+
+    def reset(self):
+        self.frameDuration = 1 / self.frameRate
+
+        self.instructions = 0 # Number of instructions executed since start
+        self.frames = 0 # Number of frames executed since start
+        self.idleFrames = 0 # Number of frames where the program only waited, without executing anything
+        self.lateFrames = 0 # Number of frames that ended after their deadline
+
+        self.startTime = time.perf_counter()
+        self.nextFrameTime = self.startTime + self.frameDuration
+
+    def start(self):
+        self.reset()
+
+    def endFrame(self, instructions, idle = False):
+        """
+            Account for a finished frame and wait for the next frame boundary.
+            Return True when the frame ended after its deadline.
+
+            - instructions: int, number of instructions executed during the frame
+            - idle: bool, the instructions were skipped because the program was waiting on a timer or a key
+        """
+
+        delay = self.nextDelay(instructions, idle)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return delay < 0
+
+    def nextDelay(self, instructions, idle = False):
+        """
+            Account for a finished frame like endFrame, but return the time left until the next frame boundary
+            instead of waiting for it, negative when the frame is late. Used by hosts that wait in their own way.
+        """
+
+        self.instructions += instructions
+        self.frames += 1
+        self.idleFrames += idle
+
+        if self.unlimited:
+            return 0
+
+        now = time.perf_counter()
+        delay = self.nextFrameTime - now
+
+        if delay < 0:
+            self.lateFrames += 1
+
+            if -delay > self.maxLateFrames * self.frameDuration:
+                self.nextFrameTime = now # Too late, drop the missed frames instead of running them all at once
+
+        self.nextFrameTime += self.frameDuration
+
+        return delay
+
+    def getElapsedTime(self):
+        return time.perf_counter() - self.startTime
+
+    def getStats(self):
+        """
+            Return the achieved instructions per second and frames per second since start.
+        """
+
+        elapsed = self.getElapsedTime()
+
+        return {
+            "instructions": self.instructions,
+            "frames": self.frames,
+            "idleFrames": self.idleFrames,
+            "lateFrames": self.lateFrames,
+            "elapsed": elapsed,
+            "ips": self.instructions / elapsed if elapsed > 0 else 0,
+            "fps": self.frames / elapsed if elapsed > 0 else 0,
+        }
+
+    def __str__(self):
+        stats = self.getStats()
+
+        return "%d instructions, %d frames (%d idle) in %.2fs: %.0f instructions/s, %.1f frames/s" % (
+            stats["instructions"], stats["frames"], stats["idleFrames"], stats["elapsed"], stats["ips"], stats["fps"]
+        )
@@ -0,0 +1,263 @@
+class Translator:
+    """
+        Translator compile straight-line basic blocks of CHIP-8 code into Python functions.
+
+        A block start at any address and run until a jump, a call, a return, a skip, a key wait, a write
+        into memory or an extended instruction. Registers used by the block are held in local variables and written back at block exit.
+        Instructions with side effects outside of the registers (drawing, random...) call the CPU handler.
+
+        A block function always leave the pc on the next instruction to execute.
+    """
+
+    def __init__(self, mem, cpu):
+        self.mem = mem
+        self.cpu = cpu
+
+        self.threshold = 8 # Number of times an address must be reached before its block is translated
+
+        self.reset()
+
+    def reset(self):
+        self.loaded = set() # Registers currently held in a local variable
+        self.dirty = set() # Registers modified since the last write back
+
+        self.lines = []
+        self.handlers = {}
+
+    def read(self, register):
+        """
+            Return the name of the local variable holding the register, load it first if needed.
+        """
+
+        if register not in self.loaded:
+            self.emit("v%X = registers[%d]" % (register, register))
+            self.loaded.add(register)
+
+        return "v%X" % register
+
+    def write(self, register):
+        """
+            Return the name of the local variable holding the register, mark it to be written back.
+        """
+
+        self.loaded.add(register)
+        self.dirty.add(register)
+
+        return "v%X" % register
+
+    def flush(self):
+        """
+            Write back the modified registers.
+        """
+
+        for register in sorted(self.dirty):
+            self.emit("registers[%d] = v%X" % (register, register))
+
+        self.dirty.clear()
+
+    def emit(self, line):
+        self.lines.append("    " + line)
+
+    def callHandler(self, address, instruction):
+        """
+            Execute the instruction through its CPU handler, registers are written back before and reloaded after.
+        """
+
+        name = "h%d" % len(self.handlers)
+        self.handlers[name] = self.cpu.decode(instruction)
+
+        self.flush()
+        self.emit("mem.pc = %d" % address)
+        self.emit(name + "()")
+
+        self.loaded.clear()
+
+    def translate(self, address, maxLength = None):
+        """
+            Translate the block starting at address, of at most maxLength instructions.
+            Return a tuple (function, number of instructions, shorter blocks), function is None when nothing can be
+            translated. Shorter blocks is an empty dict, Emu.stepTranslated keep there the same block cut at the
+            remaining instructions of a frame, by length.
+        """
+
+        self.reset()
+
+        memory = self.mem.mem
+        maxLength = min(maxLength or self.mem.maxBlockSize // 2, self.mem.maxBlockSize // 2)
+
+        length = 0
+        ended = False
+
+        while length < maxLength and address + 1 < len(memory):
+            instruction = (memory[address] << 8) + memory[address + 1]
+
+            try:
+                self.cpu.decode(instruction)
+            except Exception:
+                break # Unknown instruction, let the interpreter raise the error when it is reached
+
+            length += 1
+            ended = self.translateInstruction(address, instruction)
+            address += 2
+
+            if ended: break
+
+        if length == 0:
+            return (None, 0, {})
+
+        if not ended:
+            self.flush()
+            self.emit("mem.pc = %d" % address)
+
+        arguments = ["mem=mem", "registers=registers"] + [name + "=" + name for name in self.handlers]
+        source = "def block(" + ", ".join(arguments) + "):\n" + "\n".join(self.lines) + "\n"
+
+        namespace = dict(self.handlers, mem = self.mem, registers = self.cpu.registers)
+        exec(compile(source, "<block %s>" % hex(address - length * 2), "exec"), namespace)
+
+        return (namespace["block"], length, {})
+
+    def translateInstruction(self, address, instruction):
+        """
+            Emit the code of one instruction, return True when the instruction end the block.
+        """
+
+        code = (instruction & 0xf000) >> 12
+        x = (instruction & 0x0f00) >> 8
+        y = (instruction & 0x00f0) >> 4
+        n = instruction & 0x000f
+        nn = instruction & 0x00ff
+        nnn = instruction & 0x0fff
+
+        if code == 0x1:
+            self.flush()
+            self.emit("mem.pc = %d" % nnn)
+            return True
+
+        if code == 0x2:
+            self.flush()
+            self.emit("sp = mem.sp")
+            self.emit("mem.stack[sp] = %d" % address)
+            self.emit("mem.sp = sp + 1")
+            self.emit("mem.pc = %d" % nnn)
+            return True
+
+        if instruction == 0x00EE:
+            self.flush()
+            self.emit("sp = mem.sp - 1")
+            self.emit("mem.sp = sp")
+            self.emit("mem.pc = mem.stack[sp] + 2")
+            return True
+
+        if code == 0xB:
+            offset = self.read(x if self.cpu.quirks["jumpVx"] else 0)
+            self.flush()
+            self.emit("mem.pc = %d + %s" % (nnn, offset))
+            return True
+
+        if (code == 0x3 or code == 0x4 or (code == 0x5 and n == 0) or code == 0x9) and self.cpu.platform != "xochip":
+            left = self.read(x)
+            right = str(nn) if code == 0x3 or code == 0x4 else self.read(y)
+            operator = "==" if code == 0x3 or code == 0x5 else "!="
+
+            self.flush()
+            self.emit("mem.pc = %d if %s %s %s else %d" % (address + 4, left, operator, right, address + 2))
+            return True
+
+        if code == 0x6:
+            self.emit("%s = %d" % (self.write(x), nn))
+            return False
+
+        if code == 0x7:
+            vx = self.read(x)
+            self.emit("%s = (%s + %d) & 0xff" % (self.write(x), vx, nn))
+            return False
+
+        if code == 0x8 and n in (0x0, 0x1, 0x2, 0x3):
+            vx = self.read(x)
+            vy = self.read(y)
+            expression = [vy, vx + " | " + vy, vx + " & " + vy, vx + " ^ " + vy][n]
+
+            self.emit("%s = %s" % (self.write(x), expression))
+
+            if n != 0x0 and self.cpu.quirks["vfReset"]:
+                self.emit(self.write(15) + " = 0")
+
+            return False
+
+        if code == 0x8 and n in (0x4, 0x5, 0x7):
+            self.emit("a = " + self.read(x))
+            self.emit("b = " + self.read(y))
+
+            if n == 0x4:
+                self.emit("t = a + b")
+                self.emit(self.write(15) + " = 1 if t > 0xFF else 0")
+            elif n == 0x5:
+                self.emit("t = a - b")
+                self.emit(self.write(15) + " = 0 if b > a else 1")
+            else:
+                self.emit("t = b - a")
+                self.emit(self.write(15) + " = 0 if a > b else 1")
+
+            self.emit(self.write(x) + " = t & 0xff")
+            return False
+
+        if code == 0x8 and n in (0x6, 0xE):
+            self.emit("a = " + self.read(y if self.cpu.quirks["shiftVy"] else x))
+
+            if n == 0x6:
+                self.emit(self.write(15) + " = a & 0x01")
+                self.emit(self.write(x) + " = a >> 1")
+            else:
+                self.emit(self.write(15) + " = a >> 7")
+                self.emit(self.write(x) + " = (a << 1) & 0xFF")
+
+            return False
+
+        if code == 0xA:
+            self.emit("mem.i = %d" % nnn)
+            return False
+
+        if code == 0xF and nn == 0x07:
+            self.emit(self.write(x) + " = mem.dt")
+            return False
+
+        if code == 0xF and nn == 0x15:
+            self.emit("mem.dt = " + self.read(x))
+            return False
+
+        if code == 0xF and nn == 0x18:
+            self.emit("mem.st = " + self.read(x))
+            return False
+
+        if code == 0xF and nn == 0x29:
+            self.emit("mem.i = %s * 5" % self.read(x))
+            return False
+
+        if code == 0xF and nn == 0x1E and not self.cpu.quirks["indexOverflow"]:
+            self.emit("mem.i = (mem.i + %s) & %d" % (self.read(x), self.mem.addressMask))
+            return False
+
+        if code == 0xF and nn == 0x1E:
+            self.emit("t = mem.i + " + self.read(x))
+            self.emit("if t > %d:" % self.mem.addressMask)
+            self.emit("    %s = 1" % self.write(15))
+            self.emit("    t &= %d" % self.mem.addressMask)
+            self.emit("else:")
+            self.emit("    %s = 0" % self.write(15))
+            self.emit("mem.i = t")
+            return False
+
+        if instruction == 0x00E0 or code == 0xC or code == 0xD or (code == 0xF and nn == 0x65):
+            # Side effects outside of the registers, the pc is not modified
+            self.callHandler(address, instruction)
+            return False
+
+        # Anything else may change the pc or write into memory, the block end after the handler
+        self.callHandler(address, instruction)
+        self.emit("if mem.incrementPC:")
+        self.emit("    mem.pc += 2")
+        self.emit("else:")
+        self.emit("    mem.incrementPC = True")
+
+        return True